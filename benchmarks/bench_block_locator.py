@@ -0,0 +1,92 @@
+"""Benchmark locating and compiling the blocks of long spock functions.
+
+Compare the ast based locator of ``spock.helper.compile_blocks_code`` with the
+former statement-by-statement scan, on generated test functions with hundreds
+of lines.
+
+Usage::
+
+    python benchmarks/bench_block_locator.py [--lines 100 300 1000] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import importlib.util
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+from typing import Callable
+
+from _pytest._code.code import Code
+
+from spock.helper import clear_blocks_cache
+from spock.helper import compile_blocks_code
+
+
+def make_module(path: Path, lines: int) -> Callable:
+    """Write a module holding one spock function of about ``lines`` lines."""
+    body = ["def test_long():", "    def given(me):"]
+    body += [f"        me.v{i} = {i}" for i in range(lines // 2)]
+    body += ["", "    def expect(v0, v1):"]
+    body += [f"        assert v0 + {i} >= v1 - 1" for i in range(lines // 2)]
+    path.write_text("\n".join(body) + "\n")
+
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)  # type: ignore[arg-type]
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    return module.test_long
+
+
+def statement_scan(func: Callable) -> object:
+    """The block locator used before the ast based one."""
+    code = Code.from_function(func)
+    source = code.source()
+    body_statement_lineno = 0
+    while True:
+        statement = source.getstatement(body_statement_lineno).deindent()
+        if any("def " in line for line in statement.lines):
+            body_statement_lineno += len(statement.lines)
+            break
+        body_statement_lineno += 1
+    body = source[body_statement_lineno:].deindent()
+    return compile(ast.parse(str(body)), str(code.path), "exec")
+
+
+def ast_locator(func: Callable) -> object:
+    clear_blocks_cache()
+    return compile_blocks_code(func)
+
+
+def timeit(func: Callable, arg: object, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, nargs="+", default=[100, 300, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'lines':>8} {'statement scan':>16} {'ast locator':>14} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for lines in args.lines:
+            func = make_module(Path(tmpdir) / f"bench_blocks_{lines}.py", lines)
+            scan = timeit(statement_scan, func, args.repeat)
+            locator = timeit(ast_locator, func, args.repeat)
+            print(
+                f"{lines:>8} {scan * 1000:>14.2f}ms {locator * 1000:>12.2f}ms"
+                f" {scan / locator:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
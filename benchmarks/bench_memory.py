@@ -0,0 +1,152 @@
+"""Benchmark the memory held by spock params, expressions and boxes.
+
+Measure with tracemalloc the memory retained by a where table whose cells
+are expressions, the peak while its rows are evaluated, and the memory of
+boxes holding many values as ``me`` does in ``given`` blocks. Run it at two
+commits to compare.
+
+Usage::
+
+    python benchmarks/bench_memory.py [--rows 10000 100000] [--boxes 10000]
+        [--values 20] [--output bench_memory.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import tracemalloc
+
+from pathlib import Path
+from typing import Any
+from typing import Callable
+
+from spock.helper import Box
+from spock.param_table import ParamTable
+from spock.parameter import Expression
+from spock.parameter import Parameter
+from spock.spock import generate_arguments
+
+
+def measure(build: Callable[[], Any]) -> tuple[int, int, Any]:
+    """Return the memory retained by the result of ``build`` and the peak."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return current, peak, result
+
+
+def build_table(rows: int) -> ParamTable:
+    a, b, c, d = Parameter("a"), Parameter("b"), Parameter("c"), Parameter("d")
+    table = ParamTable()
+    table | a | b | c | d
+    for i in range(rows):
+        table | i | a * 2 + i | -(a - b) * 3 | (a + b + c) // 2
+    return table
+
+
+def expression_where(rows: int) -> Callable:
+    def where(_, a, b, c, d):
+        _ | a | b | c | d
+        for i in range(rows):
+            _ | i | a * 2 + i | -(a - b) * 3 | (a + b + c) // 2
+
+    return where
+
+
+def build_boxes(count: int, values: int) -> list[Box]:
+    boxes = []
+    for i in range(count):
+        me = Box()
+        for j in range(values):
+            setattr(me, f"value_{j}", i)
+        boxes.append(me)
+    return boxes
+
+
+def instance_size(obj: object) -> int:
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--boxes", type=int, default=10_000)
+    parser.add_argument("--values", type=int, default=20)
+    parser.add_argument("--output", type=Path, default=Path("bench_memory.json"))
+    args = parser.parse_args(argv)
+
+    sizes = {
+        "parameter": instance_size(Parameter("a")),
+        "expression": instance_size(Expression(node=(0, "a"))),
+        "empty_box": instance_size(Box()),
+    }
+    print(f"python {platform.python_version()}")
+    for name, size in sizes.items():
+        print(f"{name:>12}: {size} bytes per instance")
+
+    results: list[dict[str, Any]] = []
+    for rows in args.rows:
+        table_bytes, _, table = measure(lambda rows=rows: build_table(rows))
+        del table
+        _, eval_peak, arguments = measure(
+            lambda rows=rows: generate_arguments(expression_where(rows))
+        )
+        del arguments
+        results.append(
+            {
+                "bench": "table",
+                "rows": rows,
+                "table_bytes": table_bytes,
+                "bytes_per_row": table_bytes / rows,
+                "evaluation_peak_bytes": eval_peak,
+            }
+        )
+        print(
+            f"table {rows:>8} rows: {table_bytes / 2**20:8.2f}MiB retained"
+            f" ({table_bytes / rows:.0f}B per row),"
+            f" {eval_peak / 2**20:8.2f}MiB peak while evaluated"
+        )
+
+    boxes_bytes, _, boxes = measure(lambda: build_boxes(args.boxes, args.values))
+    del boxes
+    results.append(
+        {
+            "bench": "box",
+            "boxes": args.boxes,
+            "values": args.values,
+            "bytes": boxes_bytes,
+            "bytes_per_box": boxes_bytes / args.boxes,
+        }
+    )
+    print(
+        f"{args.boxes} boxes of {args.values} values: "
+        f"{boxes_bytes / 2**20:.2f}MiB ({boxes_bytes / args.boxes:.0f}B per box)"
+    )
+
+    args.output.write_text(
+        json.dumps(
+            {
+                "python": platform.python_version(),
+                "instance_sizes": sizes,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
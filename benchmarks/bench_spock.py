@@ -0,0 +1,256 @@
+"""Benchmark the collection and execution costs of the spock plugin.
+
+Each table size runs the in-process benchmarks of the plugin internals, then
+two pytest sessions over the same rows: one with a spock where table and one
+with ``pytest.mark.parametrize`` as a baseline. Results are printed and written
+as json, so they can be compared between releases.
+
+Usage::
+
+    python benchmarks/bench_spock.py [--sizes 10 1000 10000 100000]
+        [--repeat 3] [--output bench_spock.json] [--no-sessions]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import platform
+import sys
+import tempfile
+import time
+
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any
+from typing import Callable
+
+import pytest
+
+from spock.helper import clear_blocks_cache
+from spock.helper import get_functions_in_function
+from spock.param_table import ParamTable
+from spock.parameter import Parameter
+from spock.spock import generate_arguments
+
+
+SPOCK_MODULE = """\
+import pytest
+
+
+@pytest.mark.spock("{{a}}-{{b}}")
+def test_spock():
+    def expect(a, b, c):
+        assert a + b == c
+
+    def where(_, a, b, c):
+        _ | a | b | c
+        for i in range({rows}):
+            _ | i | i | i + i
+
+
+@pytest.mark.spock("{{a}}-{{b}}")
+def test_spock_derived():
+    def expect(a, b, c):
+        assert a + b == c
+
+    def where(_, a, b, c):
+        _ | a | b | c
+        for i in range({rows}):
+            _ | i | i | a + b
+"""
+
+PARAMETRIZE_MODULE = """\
+import pytest
+
+
+@pytest.mark.parametrize(
+    ("a", "b", "c"),
+    [(i, i, i + i) for i in range({rows})],
+    ids=[f"{{i}}-{{i}}" for i in range({rows})],
+)
+def test_parametrize(a, b, c):
+    assert a + b == c
+"""
+
+
+class SessionTimer:
+    """Pytest plugin timing the collection and the phases of every item."""
+
+    def __init__(self) -> None:
+        self.collect_start = self.collect_stop = 0.0
+        self.items = 0
+        self.phases = {"setup": 0.0, "call": 0.0, "teardown": 0.0}
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_collection(self, session: pytest.Session) -> None:
+        self.collect_start = time.perf_counter()
+
+    def pytest_collection_finish(self, session: pytest.Session) -> None:
+        self.collect_stop = time.perf_counter()
+        self.items = len(session.items)
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_setup(self, item: pytest.Item) -> Any:
+        return (yield from self._time("setup"))
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_call(self, item: pytest.Item) -> Any:
+        return (yield from self._time("call"))
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_teardown(self, item: pytest.Item) -> Any:
+        return (yield from self._time("teardown"))
+
+    def _time(self, phase: str) -> Any:
+        start = time.perf_counter()
+        try:
+            return (yield)
+        finally:
+            self.phases[phase] += time.perf_counter() - start
+
+
+def write_module(directory: Path, name: str, template: str, rows: int) -> Path:
+    path = directory / f"{name}.py"
+    path.write_text(template.format(rows=rows))
+    return path
+
+
+def import_module(path: Path) -> Any:
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)  # type: ignore[arg-type]
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    return module
+
+
+def best_of(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def build_table(where: Callable) -> ParamTable:
+    table = ParamTable()
+    where(_=table, a=Parameter("a"), b=Parameter("b"), c=Parameter("c"))
+    return table
+
+
+def get_blocks_cold(func: Callable) -> dict[str, Callable]:
+    clear_blocks_cache()
+    return get_functions_in_function(func)
+
+
+def bench_internals(module: Any, rows: int, repeat: int) -> dict[str, float]:
+    where = get_functions_in_function(module.test_spock)["where"]
+    where_derived = get_functions_in_function(module.test_spock_derived)["where"]
+    return {
+        "get_functions_in_function": best_of(
+            lambda: get_blocks_cold(module.test_spock), repeat
+        ),
+        "param_table": best_of(lambda: build_table(where), repeat),
+        "generate_arguments": best_of(lambda: generate_arguments(where), repeat),
+        "eval_params_derived": best_of(
+            lambda: generate_arguments(where_derived), repeat
+        ),
+    }
+
+
+def bench_session(path: Path, test: str) -> dict[str, float]:
+    """Run ``test`` of ``path`` in a pytest session, return its timings."""
+    sys.modules.pop(path.stem, None)
+    clear_blocks_cache()
+    timer = SessionTimer()
+    exit_code = pytest.main(
+        [
+            f"{path}::{test}",
+            "-p",
+            "no:cacheprovider",
+            "-p",
+            "no:terminal",
+            "--rootdir",
+            str(path.parent),
+        ],
+        plugins=[timer],
+    )
+    if exit_code != pytest.ExitCode.OK:
+        raise RuntimeError(f"benchmark session of {test} exited with {exit_code}")
+    items = max(timer.items, 1)
+    return {
+        "collect": timer.collect_stop - timer.collect_start,
+        **{f"{phase}_per_item": t / items for phase, t in timer.phases.items()},
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10, 1000, 10000, 100000]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=Path("bench_spock.json"))
+    parser.add_argument(
+        "--no-sessions",
+        dest="sessions",
+        action="store_false",
+        help="skip the pytest sessions, only run the benchmarks of the internals",
+    )
+    args = parser.parse_args(argv)
+
+    results: list[dict[str, Any]] = []
+    print(f"{'rows':>8} {'benchmark':<36} {'time':>12} {'per row':>12}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for rows in args.sizes:
+            directory = Path(tmpdir) / f"rows_{rows}"
+            directory.mkdir()
+            spock_path = write_module(
+                directory, f"bench_spock_{rows}", SPOCK_MODULE, rows
+            )
+            parametrize_path = write_module(
+                directory, f"bench_parametrize_{rows}", PARAMETRIZE_MODULE, rows
+            )
+
+            timings = bench_internals(import_module(spock_path), rows, args.repeat)
+            if args.sessions:
+                for suite, path, test in [
+                    ("spock", spock_path, "test_spock"),
+                    ("parametrize", parametrize_path, "test_parametrize"),
+                ]:
+                    for name, seconds in bench_session(path, test).items():
+                        timings[f"{suite}.{name}"] = seconds
+
+            for name, seconds in timings.items():
+                per_row = seconds if name.endswith("_per_item") else seconds / rows
+                results.append(
+                    {
+                        "benchmark": name,
+                        "rows": rows,
+                        "seconds": seconds,
+                        "seconds_per_row": per_row,
+                    }
+                )
+                print(
+                    f"{rows:>8} {name:<36} {seconds * 1000:>10.2f}ms"
+                    f" {per_row * 1e6:>10.2f}us"
+                )
+
+    args.output.write_text(
+        json.dumps(
+            {
+                "python": platform.python_version(),
+                "pytest": pytest.__version__,
+                "pyspock": version("pyspock"),
+                "repeat": args.repeat,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Benchmark running the rows of a spock table on a thread pool.
+
+Time a rolled up table of CPU light rows and one of I/O bound rows with
+``threads=N`` for several N. The I/O bound rows scale on any build, the CPU
+light ones only scale on a free-threaded build of CPython (3.13t and later).
+
+Usage::
+
+    python benchmarks/bench_threads.py [--threads 1 2 4 8] [--rows 2000]
+        [--io-rows 200] [--sleep 0.005] [--output bench_threads.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from bench_spock import bench_session
+
+
+THREADS_MODULE = """\
+import time
+
+import pytest
+
+
+@pytest.mark.spock(unroll=False, threads={threads})
+def test_cpu():
+    def given(me, a):
+        me.total = sum(i * i for i in range(a))
+
+    def expect(total):
+        assert total >= 0
+
+    def where(a):
+        a << [2000] * {rows}
+
+
+@pytest.mark.spock(unroll=False, threads={threads})
+def test_io():
+    def when(delay):
+        time.sleep(delay)
+
+    def then():
+        pass
+
+    def where(delay):
+        delay << [{sleep}] * {io_rows}
+"""
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--io-rows", type=int, default=200)
+    parser.add_argument("--sleep", type=float, default=0.005)
+    parser.add_argument("--output", type=Path, default=Path("bench_threads.json"))
+    args = parser.parse_args(argv)
+
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"python {platform.python_version()}, gil enabled: {gil_enabled}")
+    print(f"{'spec':>6} {'threads':>8} {'time':>12} {'speedup':>8}")
+
+    results: list[dict[str, Any]] = []
+    baselines: dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for threads in args.threads:
+            path = Path(tmpdir) / f"bench_threads_{threads}.py"
+            path.write_text(
+                THREADS_MODULE.format(
+                    threads=threads,
+                    rows=args.rows,
+                    io_rows=args.io_rows,
+                    sleep=args.sleep,
+                )
+            )
+
+            for spec in ["cpu", "io"]:
+                seconds = bench_session(path, f"test_{spec}")["call_per_item"]
+                baseline = baselines.setdefault(spec, seconds)
+                results.append(
+                    {
+                        "spec": spec,
+                        "threads": threads,
+                        "seconds": seconds,
+                        "speedup": baseline / seconds,
+                    }
+                )
+                print(
+                    f"{spec:>6} {threads:>8} {seconds * 1000:>10.2f}ms"
+                    f" {baseline / seconds:>7.2f}x"
+                )
+
+    args.output.write_text(
+        json.dumps(
+            {
+                "python": platform.python_version(),
+                "pytest": pytest.__version__,
+                "gil_enabled": gil_enabled,
+                "cpu_count": os.cpu_count(),
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
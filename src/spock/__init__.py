@@ -0,0 +1,7 @@
+from .combinations import pairwise
+from .combinations import product
+from .table_source import table_from_csv
+from .table_source import table_from_jsonl
+
+
+__all__ = ["pairwise", "product", "table_from_csv", "table_from_jsonl"]
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import ast
+import hashlib
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from _pytest.stash import StashKey
+
+from .helper import locate_function_node
+from .ids import content_hash
+
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from typing import Any
+    from typing import Callable
+
+    from _pytest.cacheprovider import Cache
+    from _pytest.nodes import Item
+    from _pytest.reports import TestReport
+
+
+CACHE_KEY = "spock/fingerprints"
+
+
+class ChangedRows:
+    """Fingerprints of the spock iterations which passed, per spock function.
+
+    It is registered as a plugin to follow the reports of the iterations.
+
+    The fingerprint of an iteration hashes the content of its row values and
+    the blocks of its spock function but the where block, so editing one row
+    of a table only changes the fingerprint of that row. Rows whose values
+    can't be hashed have no fingerprint and always run. The fingerprint is
+    carried by the reports of the iteration, so the xdist controller can
+    record it too.
+    """
+
+    def __init__(self, previous: dict[str, dict[str, str]]) -> None:
+        self.previous = previous
+        # fingerprint of the iterations which ran, None for those which failed
+        self.results: dict[str, dict[str, str | None]] = {}
+        self.pending: dict[str, tuple[str, str | None]] = {}
+        self.failed: set[str] = set()
+        self.skipped = 0
+
+    def is_unchanged(
+        self, spec: str, blocks_hash: str, nodeid: str, argument: dict[str, Any]
+    ) -> bool:
+        """Return whether the iteration passed before with the same fingerprint.
+
+        The fingerprints of the other iterations are recorded once they pass.
+        """
+        fingerprint = content_hash((blocks_hash, argument), digest_size=12)
+        if (
+            fingerprint is not None
+            and self.previous.get(spec, {}).get(nodeid) == fingerprint
+        ):
+            self.skipped += 1
+            return True
+        self.pending[nodeid] = (spec, fingerprint)
+        return False
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_makereport(
+        self, item: Item
+    ) -> Generator[None, TestReport, TestReport]:
+        report = yield
+        fingerprint = self.pending.get(item.nodeid)
+        if fingerprint is not None:
+            report.spock_fingerprint = fingerprint  # type: ignore[attr-defined]
+        return report
+
+    def pytest_runtest_logreport(self, report: TestReport) -> None:
+        fingerprint = getattr(report, "spock_fingerprint", None)
+        if fingerprint is None:
+            return
+        nodeid = report.nodeid
+        if report.failed or report.skipped:
+            self.failed.add(nodeid)
+        if report.when == "teardown":
+            spec, fingerprint = fingerprint
+            if nodeid in self.failed:
+                fingerprint = None
+            self.results.setdefault(spec, {})[nodeid] = fingerprint
+            self.failed.discard(nodeid)
+
+    def save(self, cache: Cache) -> None:
+        """Update the fingerprints in the cache with the iterations which ran."""
+        data = {
+            spec: dict(fingerprints)
+            for spec, fingerprints in cache.get(CACHE_KEY, {}).items()
+        }
+        for spec, results in self.results.items():
+            fingerprints = data.setdefault(spec, {})
+            for nodeid, fingerprint in results.items():
+                if fingerprint is None:
+                    fingerprints.pop(nodeid, None)
+                else:
+                    fingerprints[nodeid] = fingerprint
+        cache.set(
+            CACHE_KEY,
+            {
+                spec: dict(sorted(fingerprints.items()))
+                for spec, fingerprints in data.items()
+                if fingerprints
+            },
+        )
+
+
+def blocks_fingerprint(func: Callable) -> str | None:
+    """Hash the blocks of a spock function, leaving its where block out."""
+    node = locate_function_node(func.__code__)
+    if node is None:
+        return None
+    body = [
+        statement
+        for statement in node.body
+        if not (isinstance(statement, ast.FunctionDef) and statement.name == "where")
+    ]
+    return hashlib.blake2b(
+        "\n".join(ast.dump(statement) for statement in body).encode(),
+        digest_size=12,
+    ).hexdigest()
+
+
+changed_rows_key = StashKey[ChangedRows]()
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import itertools
+import random
+
+from abc import abstractmethod
+from typing import TYPE_CHECKING
+
+from .table_source import TableSource
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+    from typing import Any
+
+
+PAIRWISE_CANDIDATES = 20
+
+
+class CombinationsSource(TableSource):
+    """Rows combining the values given for each column."""
+
+    def __init__(self, columns: dict[str, Iterable[Any]]) -> None:
+        self.columns = {name: tuple(values) for name, values in columns.items()}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({', '.join(self.columns)})"
+
+    def rows(self, names: Iterable[str]) -> Iterator[tuple[Any, ...]]:
+        names = tuple(names)
+        missing = [name for name in names if name not in self.columns]
+        unknown = [name for name in self.columns if name not in names]
+        if missing or unknown:
+            raise ValueError(
+                f"columns {list(names)} of the table don't match the columns "
+                f"{list(self.columns)} of {self!r}"
+            )
+        return self.combine([self.columns[name] for name in names])
+
+    @abstractmethod
+    def combine(self, columns: list[tuple[Any, ...]]) -> Iterator[tuple[Any, ...]]:
+        """Yield the rows combining the values of ``columns``."""
+
+
+class ProductSource(CombinationsSource):
+    def combine(self, columns: list[tuple[Any, ...]]) -> Iterator[tuple[Any, ...]]:
+        return itertools.product(*columns)
+
+
+class PairwiseSource(CombinationsSource):
+    def combine(self, columns: list[tuple[Any, ...]]) -> Iterator[tuple[Any, ...]]:
+        if len(columns) < 2 or not all(columns):
+            yield from itertools.product(*columns)
+            return
+        for row in pairwise_indices([len(values) for values in columns]):
+            yield tuple(values[i] for values, i in zip(columns, row))
+
+
+def pairwise_indices(sizes: list[int]) -> Iterator[tuple[int, ...]]:
+    """Yield rows of value indices until every pair of values is covered.
+
+    Each row starts from the first pair not covered yet. Like AETG, a few
+    candidates fill the other columns in a shuffled order, each column taking
+    a value covering the most new pairs, and the best candidate is kept. The
+    shuffles are seeded, so the rows are the same on every run, and they are
+    built one at a time.
+    """
+    rng = random.Random(0)
+    pairs = list(itertools.combinations(range(len(sizes)), 2))
+    uncovered = {
+        (a, i, b, j) for a, b in pairs for i in range(sizes[a]) for j in range(sizes[b])
+    }
+
+    def new_pairs(row: list[int | None], column: int, value: int) -> int:
+        return sum(
+            (other, row[other], column, value) in uncovered
+            if other < column
+            else (column, value, other, row[other]) in uncovered
+            for other in range(len(sizes))
+            if row[other] is not None
+        )
+
+    while uncovered:
+        a, i, b, j = min(uncovered)
+        best: tuple[int, list[int | None]] | None = None
+        for _ in range(PAIRWISE_CANDIDATES):
+            row: list[int | None] = [None] * len(sizes)
+            row[a] = i
+            row[b] = j
+            columns = [column for column in range(len(sizes)) if row[column] is None]
+            rng.shuffle(columns)
+            for column in columns:
+                scores = [
+                    new_pairs(row, column, value) for value in range(sizes[column])
+                ]
+                top = max(scores)
+                row[column] = rng.choice(
+                    [value for value, score in enumerate(scores) if score == top]
+                )
+            covered = sum((a, row[a], b, row[b]) in uncovered for a, b in pairs)
+            if best is None or covered > best[0]:
+                best = (covered, row)
+        row = best[1]  # type: ignore[index]
+        uncovered.difference_update((a, row[a], b, row[b]) for a, b in pairs)
+        yield tuple(row)  # type: ignore[arg-type]
+
+
+def product(**columns: Iterable[Any]) -> ProductSource:
+    """Generate the rows of every combination of the values of the columns.
+
+    ::
+
+        def where(_, a, b):
+            _ | a | b
+            _ << product(a=[1, 2], b=["x", "y"])
+    """
+    return ProductSource(columns)
+
+
+def pairwise(**columns: Iterable[Any]) -> PairwiseSource:
+    """Generate rows covering every pair of values of any two columns.
+
+    It takes far fewer rows than :func:`product`, e.g. about a hundred rows
+    for four columns of ten values instead of ten thousand.
+    """
+    return PairwiseSource(columns)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from _pytest.stash import StashKey
+
+from .exceptions import UnableEvalParams
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+    from typing import Any
+
+
+class DuplicateRows:
+    """Find the rows of a where table which are equal to an earlier row.
+
+    Rows are compared by their evaluated values and the type of each value,
+    so ``1``, ``1.0`` and ``True`` are different rows. With ``drop``, the
+    duplicate rows are left out.
+    """
+
+    def __init__(self, drop: bool) -> None:
+        self.drop = drop
+        self.seen: set[Any] = set()
+        self.duplicates: list[int] = []
+
+    def filter(
+        self, indexed_arguments: Iterable[tuple[int, dict[str, Any] | UnableEvalParams]]
+    ) -> Iterator[tuple[int, dict[str, Any] | UnableEvalParams]]:
+        for idx, argument in indexed_arguments:
+            if not isinstance(argument, UnableEvalParams):
+                key = row_key(argument)
+                if key in self.seen:
+                    self.duplicates.append(idx)
+                    if self.drop:
+                        continue
+                else:
+                    self.seen.add(key)
+            yield idx, argument
+
+
+def row_key(argument: dict[str, Any]) -> Any:
+    key = tuple((name, type(value), value) for name, value in argument.items())
+    try:
+        hash(key)
+    except TypeError:
+        # unhashable values, like lists or dicts
+        return repr(key)
+    return key
+
+
+removed_duplicates_key = StashKey[int]()
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+import threading
+
+from typing import TYPE_CHECKING
+
+from _pytest.stash import StashKey
+
+
+if TYPE_CHECKING:
+    import os
+
+    from typing import Any
+
+
+BLOCK_ORDER = (
+    "setup_spec",
+    "given",
+    "when",
+    "then",
+    "expect",
+    "cleanup",
+    "cleanup_spec",
+)
+
+
+class BlockDurations:
+    """Durations of the blocks of every spock iteration."""
+
+    def __init__(self) -> None:
+        self.iterations: list[tuple[str, str, dict[str, float]]] = []
+        self.lock = threading.Lock()
+
+    def add(self, nodeid: str, spec: str, durations: dict[str, float]) -> None:
+        if durations:
+            with self.lock:
+                self.iterations.append((nodeid, spec, durations))
+
+    def slowest(self, count: int) -> list[tuple[str, str, dict[str, float]]]:
+        """Return the ``count`` slowest iterations, all of them when 0."""
+        iterations = sorted(
+            self.iterations, key=lambda it: sum(it[2].values()), reverse=True
+        )
+        return iterations[:count] if count else iterations
+
+    def per_spec(self) -> dict[str, tuple[int, dict[str, float]]]:
+        """Return the number of iterations and the block totals of each spec."""
+        specs: dict[str, tuple[int, dict[str, float]]] = {}
+        for _, spec, durations in self.iterations:
+            count, totals = specs.get(spec, (0, {}))
+            for block, duration in durations.items():
+                totals[block] = totals.get(block, 0.0) + duration
+            specs[spec] = (count + 1, totals)
+        return specs
+
+    def summary_lines(self, count: int) -> list[str]:
+        return [
+            f"{sum(durations.values()):02.2f}s {format_blocks(durations)}  {nodeid}"
+            for nodeid, _, durations in self.slowest(count)
+        ]
+
+    def spec_lines(self) -> list[str]:
+        return [
+            f"{spec}: {format_blocks(totals)} ({count} iterations)"
+            for spec, (count, totals) in self.per_spec().items()
+        ]
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "iterations": [
+                {
+                    "nodeid": nodeid,
+                    "spec": spec,
+                    "total": sum(durations.values()),
+                    "durations": durations,
+                }
+                for nodeid, spec, durations in self.iterations
+            ],
+            "specs": [
+                {"spec": spec, "iterations": count, "durations": totals}
+                for spec, (count, totals) in self.per_spec().items()
+            ],
+        }
+
+    def write_json(self, path: str | os.PathLike) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, indent=2)
+
+
+def format_blocks(durations: dict[str, float]) -> str:
+    blocks = sorted(
+        durations,
+        key=lambda b: BLOCK_ORDER.index(b) if b in BLOCK_ORDER else len(BLOCK_ORDER),
+    )
+    return " ".join(f"{block}={durations[block]:.2f}s" for block in blocks)
+
+
+block_durations_key = StashKey[BlockDurations]()
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import asyncio
+
+from typing import TYPE_CHECKING
+
+from _pytest.stash import StashKey
+
+
+if TYPE_CHECKING:
+    from _pytest.config import Config
+
+
+event_loop_key = StashKey[asyncio.AbstractEventLoop]()
+
+
+def get_event_loop(config: Config) -> asyncio.AbstractEventLoop:
+    """Return the event loop running the async blocks of the session.
+
+    The loop is created on first use and closed when the session ends.
+    """
+    loop = config.stash.get(event_loop_key, None)
+    if loop is None:
+        loop = config.stash[event_loop_key] = asyncio.new_event_loop()
+    return loop
+
+
+def close_event_loop(config: Config) -> None:
+    loop = config.stash.get(event_loop_key, None)
+    if loop is None:
+        return
+    del config.stash[event_loop_key]
+    try:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+    finally:
+        loop.close()
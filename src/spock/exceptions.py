@@ -1,4 +1,36 @@
+from __future__ import annotations
+
+
 class UnableEvalParams(Exception):
     """
     Exception raised when unable to evaluate params.
     """
+
+
+class CyclicParamsError(UnableEvalParams):
+    """
+    Exception raised when params reference each other in a cycle.
+    """
+
+    def __init__(self, names: list[str]) -> None:
+        self.names = names
+        super().__init__(f"cyclic references between params: {' -> '.join(names)}")
+
+    def __reduce__(self) -> tuple[type, tuple[list[str]]]:
+        return self.__class__, (self.names,)
+
+
+class IterationsFailed(Exception):
+    """
+    Exception raised when iterations of a rolled up spock function failed.
+    """
+
+    def __init__(self, ids: list[str], total: int) -> None:
+        self.ids = ids
+        super().__init__(f"{len(ids)} of {total} iterations failed: {', '.join(ids)}")
+
+
+class SetupSpecError(Exception):
+    """
+    Exception raised for each iteration after the setup_spec block failed.
+    """
@@ -1,71 +1,344 @@
+from __future__ import annotations
+
 import ast
+import functools
+import hashlib
 import inspect
+import linecache
+import marshal
+import os
+import sys
+import threading
 
+from importlib.util import MAGIC_NUMBER
+from types import CodeType
+from types import FunctionType
+from typing import TYPE_CHECKING
 from typing import Any
 from typing import Callable
+from typing import Optional
 
-from _pytest._code.code import Code
 from _pytest._code.source import Source
 
 
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+BLOCKS_FACTORY_NAME = "__spock_blocks__"
+
+FileStamp = Optional[tuple[int, int]]
+
+_blocks_cache: dict[tuple[str, CodeType, bool], tuple[FileStamp, CodeType]] = {}
+_blocks_disk_cache: BlocksDiskCache | None = None
+_parsed_files: dict[str, tuple[FileStamp, dict[tuple[str, int], ast.FunctionDef]]] = {}
+# guards the caches above, so blocks may be looked up from several threads
+_blocks_lock = threading.RLock()
+
+
 def get_functions_in_function(
     func: Callable,
 ) -> dict[str, Callable]:
     """Return functions contained in the passed function."""
-    context: dict[str, Any] = getattr(func, "__globals__", {})
+    return get_blocks_factory(func)()
 
-    code = Code.from_function(func)
-    args = code.getargs()
+
+def get_blocks_factory(func: Callable) -> Callable[[], dict[str, Callable]]:
+    """Return a function running the body of ``func`` to build its blocks.
+
+    Every call runs the body again, so the blocks it returns have fresh
+    values of the body in their closures.
+    """
+    factory = FunctionType(get_blocks_code(func), func.__globals__)  # type: ignore
     if inspect.ismethod(func):
-        context[args[0]] = func.__self__  # type: ignore[attr-defined]
-
-    filename, firstlineno = code.path, code.firstlineno
-    source = code.source()
-    # skip def statement
-    body_statement_lineno = 0
-    while True:
-        statement = source.getstatement(body_statement_lineno).deindent()
-        if any("def " in line for line in statement.lines):  # see deepsource PTC-W0016
-            body_statement_lineno += len(statement.lines)
-            break
-        body_statement_lineno += 1
-
-    body_firstlineno = body_statement_lineno
-    body = source[body_statement_lineno:].deindent()
-    co = compile(str(body), str(filename), "exec")
-
-    eval(co, context)  # skipcq: PYL-W0123
-    context = {
-        k: v
-        for k, v in context.items()
-        if inspect.isfunction(v) and k in get_function_names(str(body))
-    }
-    for f in context.values():
-        f_firstlineno = f.__code__.co_firstlineno + firstlineno
-        f.__code__ = f.__code__.replace(
-            co_filename=str(filename),
-            co_firstlineno=f_firstlineno + body_firstlineno,
+        return functools.partial(factory, func.__self__)
+    return factory
+
+
+def get_blocks_code(func: Callable) -> CodeType:
+    """Return the cached code of the factory building the blocks of ``func``.
+
+    The factory is compiled once per code object, and compiled again when the
+    file defining ``func`` changes.
+    """
+    code: CodeType = func.__code__  # type: ignore[attr-defined]
+    bound = inspect.ismethod(func)
+    key = (code.co_filename, code, bound)
+    stamp = get_file_stamp(code.co_filename)
+    cached = _blocks_cache.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    with _blocks_lock:
+        cached = _blocks_cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        disk_cache = _blocks_disk_cache
+        blocks_code = disk_cache.load(code, bound) if disk_cache else None
+        if blocks_code is None:
+            blocks_code = compile_blocks_code(func)
+            if disk_cache is not None:
+                disk_cache.store(code, bound, blocks_code)
+        _blocks_cache[key] = (stamp, blocks_code)
+        return blocks_code
+
+
+def clear_blocks_cache() -> None:
+    with _blocks_lock:
+        _blocks_cache.clear()
+        _parsed_files.clear()
+
+
+def set_blocks_disk_cache(
+    disk_cache: BlocksDiskCache | None,
+) -> BlocksDiskCache | None:
+    """Set the disk cache used by :func:`get_blocks_code`, return the old one."""
+    global _blocks_disk_cache
+    old, _blocks_disk_cache = _blocks_disk_cache, disk_cache
+    return old
+
+
+class BlocksDiskCache:
+    """Store compiled blocks factories across sessions, much like ``.pyc`` files.
+
+    There is one cache file per source file, holding the factories of every
+    spock function defined in it. A cache file is only used when the source
+    hash and the python version it was written for still match.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.files: dict[str, _BlocksCacheFile] = {}
+        self.dirty: set[str] = set()
+
+    def load(self, code: CodeType, bound: bool) -> CodeType | None:
+        cache_file = self._get_file(code.co_filename)
+        if cache_file is None:
+            return None
+        return cache_file.entries.get((code.co_name, code.co_firstlineno, bound))
+
+    def store(self, code: CodeType, bound: bool, blocks_code: CodeType) -> None:
+        cache_file = self._get_file(code.co_filename)
+        if cache_file is None:
+            return
+        cache_file.entries[(code.co_name, code.co_firstlineno, bound)] = blocks_code
+        self.dirty.add(code.co_filename)
+
+    def flush(self) -> None:
+        """Write the cache files which got new entries."""
+        for filename in sorted(self.dirty):
+            cache_file = self.files[filename]
+            path = self._cache_path(filename)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            try:
+                tmp_path.write_bytes(
+                    marshal.dumps(
+                        (MAGIC_NUMBER, cache_file.source_hash, cache_file.entries)
+                    )
+                )
+                os.replace(tmp_path, path)
+            except OSError:  # pragma: no cover
+                continue
+        self.dirty.clear()
+
+    def _get_file(self, filename: str) -> _BlocksCacheFile | None:
+        stamp = get_file_stamp(filename)
+        if stamp is None:
+            return None
+        cache_file = self.files.get(filename)
+        if cache_file is not None and cache_file.stamp == stamp:
+            return cache_file
+
+        try:
+            with open(filename, "rb") as f:
+                source_hash = hashlib.sha1(f.read()).hexdigest()
+        except OSError:  # pragma: no cover
+            return None
+        entries: dict[tuple[str, int, bool], CodeType] = {}
+        try:
+            magic, cached_hash, cached_entries = marshal.loads(
+                self._cache_path(filename).read_bytes()
+            )
+            if magic == MAGIC_NUMBER and cached_hash == source_hash:
+                entries = cached_entries
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+        cache_file = self.files[filename] = _BlocksCacheFile(
+            stamp, source_hash, entries
         )
+        return cache_file
+
+    def _cache_path(self, filename: str) -> Path:
+        name = hashlib.sha1(filename.encode()).hexdigest()
+        return self.directory / f"{name}.{sys.implementation.cache_tag}"
+
+
+class _BlocksCacheFile:
+    def __init__(
+        self,
+        stamp: FileStamp,
+        source_hash: str,
+        entries: dict[tuple[str, int, bool], CodeType],
+    ) -> None:
+        self.stamp = stamp
+        self.source_hash = source_hash
+        self.entries = entries
+
+
+def get_file_stamp(filename: str) -> FileStamp:
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
 
-    return context
+
+def compile_blocks_code(func: Callable) -> CodeType:
+    """Compile the body of ``func`` into a factory returning its functions.
+
+    The body is wrapped into a function named ``__spock_blocks__``, so values
+    defined in the body stay in their own namespace instead of leaking into
+    the module globals. For methods the factory takes the bound argument.
+    """
+    code: CodeType = func.__code__  # type: ignore[attr-defined]
+    node = locate_function_node(code)
+    if node is None:
+        raise ValueError(f"unable to find source of {func!r}")
+
+    if inspect.ismethod(func):
+        arguments = ast.arguments(
+            posonlyargs=[],
+            args=[(node.args.posonlyargs + node.args.args)[0]],
+            vararg=None,
+            kwonlyargs=[],
+            kw_defaults=[],
+            kwarg=None,
+            defaults=[],
+        )
+    else:
+        arguments = ast.arguments(
+            posonlyargs=[],
+            args=[],
+            vararg=None,
+            kwonlyargs=[],
+            kw_defaults=[],
+            kwarg=None,
+            defaults=[],
+        )
+
+    names = get_block_names(node.body)
+    factory_def = ast.FunctionDef(
+        name=BLOCKS_FACTORY_NAME,
+        args=arguments,
+        body=[
+            *node.body,
+            ast.copy_location(
+                ast.Return(
+                    value=ast.Dict(
+                        keys=[ast.Constant(value=name) for name in names],
+                        values=[ast.Name(id=name, ctx=ast.Load()) for name in names],
+                    )
+                ),
+                node.body[-1],
+            ),
+        ],
+        decorator_list=[],
+        returns=None,
+        type_comment=None,
+        type_params=[],
+    )
+    ast.copy_location(factory_def, node)
+    factory_tree = ast.fix_missing_locations(
+        ast.Module(body=[factory_def], type_ignores=[])
+    )
+
+    module_code = compile(factory_tree, code.co_filename, "exec")
+    return next(
+        const
+        for const in module_code.co_consts
+        if isinstance(const, CodeType) and const.co_name == BLOCKS_FACTORY_NAME
+    )
+
+
+def locate_function_node(code: CodeType) -> ast.FunctionDef | None:
+    """Return the ``def`` node of ``code`` from its parsed source file.
+
+    Each file is parsed once and indexed by function name and first line, where
+    the first line of a decorated function is the line of its first decorator.
+    """
+    filename = code.co_filename
+    stamp = get_file_stamp(filename)
+    cached = _parsed_files.get(filename)
+    if cached is None or cached[0] != stamp:
+        linecache.checkcache(filename)
+        source = "".join(linecache.getlines(filename))
+        if not source:
+            return None
+        function_nodes = {}
+        for node in ast.walk(ast.parse(source, filename)):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                firstlineno = min(
+                    [node.lineno, *(d.lineno for d in node.decorator_list)]
+                )
+                function_nodes[(node.name, firstlineno)] = node
+        cached = _parsed_files[filename] = (stamp, function_nodes)
+    return cached[1].get((code.co_name, code.co_firstlineno))  # type: ignore
+
+
+def get_block_names(nodes: list[ast.stmt]) -> list[str]:
+    return [
+        node.name
+        for node in nodes
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+    ]
 
 
 def get_function_names(source: str) -> list[str]:
     source = Source(source).deindent()  # type: ignore
-    bodies = ast.parse(str(source)).body
-    return [body.name for body in bodies if isinstance(body, ast.FunctionDef)]
+    return get_block_names(ast.parse(str(source)).body)
 
 
 class Box:
+    """Values set on ``me``, kept in ``_data`` only.
+
+    Private names are kept apart in ``_private``, which is only created when
+    one is set.
+    """
+
+    __slots__ = ("_data", "_private")
+
     _data: dict[str, Any]
+    _private: dict[str, Any] | None
 
-    def __new__(cls) -> "Box":
+    def __new__(cls) -> Box:
         box = super().__new__(cls)
-        box._data = {}
+        object.__setattr__(box, "_data", {})
+        object.__setattr__(box, "_private", None)
 
         return box
 
     def __setattr__(self, name: str, value: Any) -> None:
         if not name.startswith("_"):
             self._data[name] = value
-        super().__setattr__(name, value)
+        elif name in Box.__slots__:
+            object.__setattr__(self, name, value)
+        else:
+            if self._private is None:
+                object.__setattr__(self, "_private", {})
+            self._private[name] = value  # type: ignore[index]
+
+    def __getattr__(self, name: str) -> Any:
+        values = self._private if name.startswith("_") else self._data
+        try:
+            return values[name]  # type: ignore[index]
+        except (KeyError, TypeError):
+            raise AttributeError(name) from None
+
+    def __delattr__(self, name: str) -> None:
+        values = self._private if name.startswith("_") else self._data
+        try:
+            del values[name]  # type: ignore[attr-defined]
+        except (KeyError, TypeError):
+            raise AttributeError(name) from None
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import hashlib
+import pickle
+import string
+
+from collections.abc import Sized
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from typing import Any
+
+
+MAX_VALUE_LENGTH = 64
+
+_formatter = string.Formatter()
+
+
+class IdTemplate:
+    """The spock message of a function, parsed once to render its row ids.
+
+    Each value of an id is bounded to ``MAX_VALUE_LENGTH`` characters, larger
+    values are replaced by their type name and a short hash of their content.
+    """
+
+    def __init__(self, message: str | None) -> None:
+        self.message = message
+        self.fields: list[tuple[str, str | None, str, str | None]] | None = None
+        if message is not None:
+            self.fields = list(_formatter.parse(message))
+
+    def render(self, argument: dict[str, Any]) -> str:
+        """Return the id of a row, formatted with the spock message if any."""
+        if self.fields is not None:
+            try:
+                return self.format(argument)
+            except (AttributeError, KeyError):
+                pass
+        return "-".join(format_value(value) for value in argument.values())
+
+    def format(self, argument: dict[str, Any]) -> str:
+        parts = []
+        for literal, field_name, format_spec, conversion in self.fields or ():
+            parts.append(literal)
+            if field_name is None:
+                continue
+            value, _ = _formatter.get_field(field_name, (), argument)
+            if is_oversized(value):
+                parts.append(hash_value(value))
+                continue
+            value = _formatter.convert_field(value, conversion)
+            if format_spec:
+                # nested fields of the spec, e.g. "{a:{width}}"
+                format_spec = _formatter.vformat(format_spec, (), argument)
+            parts.append(bound(value, format(value, format_spec)))
+        return "".join(parts)
+
+
+def format_value(value: Any) -> str:
+    """Return ``str(value)``, or a short hash of it if it is too long."""
+    if is_oversized(value):
+        return hash_value(value)
+    return bound(value, str(value))
+
+
+def is_oversized(value: Any) -> bool:
+    # skip str() on large containers, strings and bytes
+    try:
+        return isinstance(value, Sized) and len(value) > MAX_VALUE_LENGTH
+    except Exception:
+        return False
+
+
+def bound(value: Any, text: str) -> str:
+    return hash_value(value) if len(text) > MAX_VALUE_LENGTH else text
+
+
+def hash_value(value: Any) -> str:
+    digest = content_hash(value, digest_size=6)
+    if digest is None:
+        # values which can't be pickled, their repr is the best we have
+        digest = hashlib.blake2b(repr(value).encode(), digest_size=6).hexdigest()
+    return f"{type(value).__name__}#{digest}"
+
+
+def content_hash(value: Any, digest_size: int) -> str | None:
+    """Return a hash of the content of ``value``, None if it can't be hashed.
+
+    Strings, bytes and numbers are hashed as they are and builtin containers
+    item by item, other values are pickled into the hash. Their repr is never
+    built, it may be huge or leave out the middle of large values.
+    """
+    h = hashlib.blake2b(digest_size=digest_size)
+    try:
+        update_content_hash(h, value, set())
+    except Exception:
+        return None
+    return h.hexdigest()
+
+
+def update_content_hash(h: Any, value: Any, parents: set[int]) -> None:
+    kind = type(value)
+    h.update(f"{kind.__module__}.{kind.__qualname__}\0".encode())
+    if kind is str:
+        update_chunk(h, value.encode("utf-8", "surrogatepass"))
+    elif kind is bytes or kind is bytearray:
+        update_chunk(h, value)
+    elif kind is int:
+        update_chunk(
+            h, value.to_bytes(value.bit_length() // 8 + 1, "little", signed=True)
+        )
+    elif value is None or kind is bool or kind is float or kind is complex:
+        update_chunk(h, repr(value).encode())
+    elif kind in (list, tuple, dict, set, frozenset):
+        if id(value) in parents:
+            raise ValueError("cyclic value")
+        parents.add(id(value))
+        h.update(len(value).to_bytes(8, "little"))
+        if kind is dict:
+            for key, item in value.items():
+                update_content_hash(h, key, parents)
+                update_content_hash(h, item, parents)
+        elif kind is set or kind is frozenset:
+            # the order of a set changes with the hash seed of the process
+            digests = []
+            for item in value:
+                item_hash = hashlib.blake2b(digest_size=16)
+                update_content_hash(item_hash, item, parents)
+                digests.append(item_hash.digest())
+            for digest in sorted(digests):
+                h.update(digest)
+        else:
+            for item in value:
+                update_content_hash(h, item, parents)
+        parents.discard(id(value))
+    else:
+        # pickled in frames written straight into the hash
+        pickle.Pickler(_HashWriter(h), protocol=4).dump(value)
+
+
+def update_chunk(h: Any, data: bytes | bytearray) -> None:
+    h.update(len(data).to_bytes(8, "little"))
+    h.update(data)
+
+
+class _HashWriter:
+    def __init__(self, h: Any) -> None:
+        self.write = h.update
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from _pytest.stash import StashKey
+
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+    from _pytest.cacheprovider import Cache
+    from _pytest.nodes import Item
+    from _pytest.reports import TestReport
+
+
+CACHE_KEY = "spock/lastfailed"
+
+
+class LastFailedRows:
+    """Index and id of the failed rows of each spock function.
+
+    It is registered as a plugin to follow the reports of the iterations,
+    which carry their spec, index and row id so the xdist controller can
+    record them too. With ``active``, only the rows which failed in the last
+    run are evaluated and collected, as long as some rows failed.
+    """
+
+    def __init__(self, previous: dict[str, list[list]], active: bool) -> None:
+        self.previous = {spec: dict(rows) for spec, rows in previous.items()}
+        self.active = active and any(self.previous.values())
+        self.items: dict[str, tuple[str, int, str]] = {}
+        # row id of the rows which ran, None for those which passed
+        self.results: dict[str, dict[int, str | None]] = {}
+
+    def failed_rows(self, spec: str) -> dict[int, str] | None:
+        """Return the failed rows of ``spec`` to run, None to run every row."""
+        if not self.active:
+            return None
+        return self.previous.get(spec, {})
+
+    def add(self, nodeid: str, spec: str, idx: int, row_id: str) -> None:
+        self.items[nodeid] = (spec, idx, row_id)
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_makereport(
+        self, item: Item
+    ) -> Generator[None, TestReport, TestReport]:
+        report = yield
+        row = self.items.get(item.nodeid)
+        if row is not None:
+            report.spock_row = row  # type: ignore[attr-defined]
+        return report
+
+    def pytest_runtest_logreport(self, report: TestReport) -> None:
+        row = getattr(report, "spock_row", None)
+        if row is None:
+            return
+        spec, idx, row_id = row
+        results = self.results.setdefault(spec, {})
+        if report.failed:
+            results[idx] = row_id
+        elif report.when == "teardown":
+            results.setdefault(idx, None)
+
+    def save(self, cache: Cache) -> None:
+        """Update the failed rows in the cache with the rows which ran."""
+        data = {spec: dict(rows) for spec, rows in cache.get(CACHE_KEY, {}).items()}
+        for spec, results in self.results.items():
+            rows = data.setdefault(spec, {})
+            for idx, row_id in results.items():
+                if row_id is None:
+                    rows.pop(idx, None)
+                else:
+                    rows[idx] = row_id
+        cache.set(
+            CACHE_KEY,
+            {spec: sorted(rows.items()) for spec, rows in data.items() if rows},
+        )
+
+
+last_failed_key = StashKey[LastFailedRows]()
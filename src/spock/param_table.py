@@ -1,22 +1,24 @@
 from __future__ import annotations
 
-import itertools
-
 from collections import defaultdict
 from collections.abc import Iterable
 from collections.abc import Iterator
 from itertools import chain
 from itertools import cycle
+from itertools import zip_longest
 from typing import Any
 
+from .parameter import AddArgumentsFailed
 from .parameter import Parameter
+from .table_source import TableSource
 
 
 class ParamTable(Iterable):
     def __init__(self) -> None:
         self.columns: list[list[Parameter]] = [[]]
         self.arguments_mapping: defaultdict[str, list[Any]] = defaultdict(list)
-        self.current_columns_generate: cycle[Parameter] | None = None
+        self.sources: dict[int, TableSource] = {}
+        self.current_columns_generate: cycle[list[Any]] | None = None
         self.seen_param_names: set[str] = set()
 
     def __or__(self, arg: Any) -> ParamTable:
@@ -28,33 +30,76 @@ class ParamTable(Iterable):
             self.columns[-1].append(arg)
             return self
 
-        # enable Parameter __accept_expression__
-        for column in chain(*self.columns):
+        if self.current_columns_generate is None:
+            self.current_columns_generate = self._end_header()
+
+        next(self.current_columns_generate).append(arg)
+        return self
+
+    def _end_header(self) -> cycle[list[Any]]:
+        """Enable expressions on the last declared columns, once per header.
+
+        Return a cycle over the value lists of these columns.
+        """
+        columns = self.columns[-1]
+        for column in columns:
             column.__accept_expression__ = True
+        return cycle([self.arguments_mapping[column.__name__] for column in columns])
 
-        if self.current_columns_generate is None:
-            self.current_columns_generate = cycle(self.columns[-1])
+    @property
+    def names(self) -> tuple[str, ...]:
+        """Column names, in the order of the values of each row."""
+        return tuple(column.__name__ for column in chain(*self.columns))
 
-        column = next(self.current_columns_generate)
-        self.arguments_mapping[column.__name__].append(arg)
+    def __lshift__(self, source: TableSource) -> ParamTable:
+        """Read the rows of the last declared columns from ``source``."""
+        if not isinstance(source, TableSource):
+            raise AddArgumentsFailed("table rows must be read from a table source")
+        if not self.columns[-1] or self.current_columns_generate is not None:
+            raise AddArgumentsFailed(
+                "declare the columns before reading rows from a table source"
+            )
+
+        self.current_columns_generate = self._end_header()
+        self.sources[len(self.columns) - 1] = source
         return self
 
     def __iter__(self) -> Iterator[Any]:
-        max_len = max(len(args) for args in self.arguments_mapping.values())
-        for i in range(max_len):
-            items = []
-            for arguments in self.arguments_mapping.values():
-                try:
-                    arg = arguments[i]
-                except IndexError:
-                    arg = None
-                items.append(arg)
-            yield tuple(items)
+        if not self.sources:
+            mapping = self.arguments_mapping
+            yield from zip_longest(*(mapping.get(name, ()) for name in self.names))
+            return
+
+        sections: list[tuple[Iterator[tuple[Any, ...]], int]] = []
+        for index, columns in enumerate(self.columns):
+            names = [column.__name__ for column in columns]
+            source = self.sources.get(index)
+            if source is not None:
+                sections.append((source.rows(names), len(names)))
+            else:
+                sections.append((self._iter_section(names), len(names)))
+
+        while True:
+            row: tuple[Any, ...] = ()
+            exhausted = 0
+            for rows, width in sections:
+                values = next(rows, None)
+                if values is None:
+                    exhausted += 1
+                    values = (None,) * width
+                row += values
+            if exhausted == len(sections):
+                return
+            yield row
+
+    def _iter_section(self, names: list[str]) -> Iterator[tuple[Any, ...]]:
+        mapping = self.arguments_mapping
+        return zip_longest(*(mapping.get(name, ()) for name in names))
 
     def to_dict(self) -> list[dict[str, Any]]:
-        return [
-            dict(
-                zip((column.__name__ for column in itertools.chain(*self.columns)), row)
-            )
-            for row in self
-        ]
+        return list(self.iter_dicts())
+
+    def iter_dicts(self) -> Iterator[dict[str, Any]]:
+        names = self.names
+        for row in self:
+            yield dict(zip(names, row))
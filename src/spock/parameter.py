@@ -3,13 +3,55 @@ from __future__ import annotations
 import operator as op
 
 from collections.abc import Iterable
+from collections.abc import Iterator
 from typing import Any
 from typing import Callable
 
+from .exceptions import CyclicParamsError
 from .exceptions import UnableEvalParams
 
 
+# expression tree nodes are tuples tagged by their kind, constants are kept
+# apart from the tree so that cells of the same shape share a compiled function:
+#   (PARAM, name)            value of the column ``name``
+#   (CONST,)                 next constant
+#   (CALL,)                  next constant called with ``**columns``
+#   (OP, func, *operands)    operator applied to the operands, when ``func`` is
+#                            None the operator is the next constant
+PARAM, CONST, CALL, OP = range(4)
+CONST_NODE = (CONST,)
+
+NO_OPERAND: Any = object()
+
+OPERATOR_TEMPLATES: dict[Callable, str] = {
+    op.pos: "(+{})",
+    op.neg: "(-{})",
+    op.invert: "(~{})",
+    op.add: "({} + {})",
+    op.sub: "({} - {})",
+    op.mul: "({} * {})",
+    op.floordiv: "({} // {})",
+    op.truediv: "({} / {})",
+    op.mod: "({} % {})",
+    op.pow: "({} ** {})",
+    op.lshift: "({} << {})",
+    op.rshift: "({} >> {})",
+    op.and_: "({} & {})",
+    op.xor: "({} ^ {})",
+    op.or_: "({} | {})",
+    op.matmul: "({} @ {})",
+    op.lt: "({} < {})",
+    op.le: "({} <= {})",
+    op.gt: "({} > {})",
+    op.ge: "({} >= {})",
+    op.eq: "({} == {})",
+    op.ne: "({} != {})",
+}
+
+
 class Parameter:
+    __slots__ = ("__accept_expression__", "__name__", "__param_arguments__")
+
     def __init__(self, name: str) -> None:
         self.__name__ = name
         self.__param_arguments__: list[Any] = []
@@ -23,22 +65,15 @@ class Parameter:
     def __call__(self, **kwargs: Any) -> Any:
         return kwargs[self.__name__]
 
-    def __build_expression__(self, func: Callable, rv: Any = None) -> Expression:
+    @property
+    def __node__(self) -> tuple:
+        return (PARAM, self.__name__)
+
+    def __build_expression__(self, func: Callable, rv: Any = NO_OPERAND) -> Expression:
         if not self.__accept_expression__:
             raise BuildExpressionError("only support build expression in table")
 
-        def new_func(**kwargs: Any) -> Any:
-            arg = kwargs[self.__name__]
-            args = [arg]
-
-            nonlocal rv
-            if rv is not None:
-                if isinstance(rv, (Parameter, Expression)):
-                    rv = rv(**kwargs)
-                args.append(rv)
-            return func(*args)
-
-        return Expression(new_func)
+        return Expression.__from_operator__(func, self, rv)
 
     def __rrshift__(self, args: Iterable) -> Parameter:
         if not isinstance(args, Iterable):
@@ -120,36 +155,80 @@ class Parameter:
 
 
 class Expression:
-    def __init__(self, func: Callable) -> None:
-        self.__func__ = func
-
-    def __rebuild_expression__(self, func: Callable, rv: Any = None) -> Expression:
-        self_func = self.__func__
-
-        if rv is None:
-
-            def new_func(**kwargs: Any) -> Any:
-                value = self_func(**kwargs)
-                return func(value)
-
+    """Expression built from table columns with operators.
+
+    The operators record an expression tree, which is compiled once into a
+    single flat function taking the column values as positional arguments.
+    """
+
+    __slots__ = ("__constants__", "__node__", "__params__")
+
+    def __init__(
+        self,
+        func: Callable | None = None,
+        node: tuple = (CALL,),
+        constants: tuple = (),
+        params: tuple[str, ...] | None = None,
+    ) -> None:
+        self.__node__ = node
+        self.__constants__ = constants if func is None else (func,)
+        # names of the columns used by the expression, None if unknown
+        self.__params__ = params
+
+    @classmethod
+    def __from_operator__(
+        cls, func: Callable, operand: Any, rv: Any = NO_OPERAND
+    ) -> Expression:
+        if func in OPERATOR_TEMPLATES:
+            node: tuple = (OP, func)
+            constants: tuple = ()
         else:
-            if isinstance(rv, Expression):
-
-                def new_func(**kwargs: Any) -> Any:
-                    self_value = self_func(**kwargs)
-                    rv_value = rv(**kwargs)  # type: ignore
-                    return func(self_value, rv_value)
-
+            node, constants = (OP, None), (func,)
+        params: tuple[str, ...] | None = ()
+        for value in (operand,) if rv is NO_OPERAND else (operand, rv):
+            if isinstance(value, Parameter):
+                name = value.__name__
+                node += ((PARAM, name),)
+                if params is not None and name not in params:
+                    params += (name,)
+            elif isinstance(value, Expression):
+                node += (value.__node__,)
+                constants += value.__constants__
+                value_params = value.__params__
+                if params is None or value_params is None:
+                    params = None
+                elif not params:
+                    params = value_params
+                else:
+                    params += tuple(p for p in value_params if p not in params)
             else:
-
-                def new_func(**kwargs: Any) -> Any:
-                    self_value = self_func(**kwargs)
-                    return func(self_value, rv)
-
-        return Expression(new_func)
+                node += (CONST_NODE,)
+                constants += (value,)
+        return cls(node=node, constants=constants, params=params)
+
+    def __rebuild_expression__(
+        self, func: Callable, rv: Any = NO_OPERAND
+    ) -> Expression:
+        return Expression.__from_operator__(func, self, rv)
+
+    def __compile__(self) -> Callable:
+        """Return the expression compiled into a flat function.
+
+        The function takes the constants of the expression, then the values
+        of ``__params__`` positionally. When the expression calls a plain
+        function the params are unknown, and the function takes all the
+        columns as keyword arguments after the constants.
+        """
+        func = _compiled_expressions.get(self.__node__)
+        if func is None:
+            func = compile_expression(self.__node__, self.__params__)
+        return func
 
     def __call__(self, **kwargs: Any) -> Any:
-        return self.__func__(**kwargs)
+        func, params = self.__compile__(), self.__params__
+        if params is None:
+            return func(*self.__constants__, **kwargs)
+        return func(*self.__constants__, *[kwargs[name] for name in params])
 
     def __pos__(self) -> Expression:
         return self.__rebuild_expression__(op.pos)
@@ -218,6 +297,59 @@ class Expression:
         return self.__rebuild_expression__(op.ne, rv)
 
 
+_compiled_expressions: dict[tuple, Callable] = {}
+
+
+def compile_expression(node: tuple, params: tuple[str, ...] | None) -> Callable:
+    """Compile an expression tree into a flat function.
+
+    Constants are passed as the first arguments of the function, so trees of
+    the same shape share one function and a table compiles each kind of cell
+    once.
+    """
+    func = _compiled_expressions.get(node)
+    if func is not None:
+        return func
+
+    constant_names: list[str] = []
+
+    def next_constant() -> str:
+        constant_names.append(f"_c{len(constant_names)}")
+        return constant_names[-1]
+
+    def to_source(node: tuple) -> str:
+        kind = node[0]
+        if kind == PARAM:
+            if params is None:
+                return f"_kwargs[{node[1]!r}]"
+            return f"_p{params.index(node[1])}"
+        if kind == CONST:
+            return next_constant()
+        if kind == CALL:
+            return f"{next_constant()}(**_kwargs)"
+        if node[1] is None:
+            func = next_constant()
+            return f"{func}({', '.join(to_source(n) for n in node[2:])})"
+        return OPERATOR_TEMPLATES[node[1]].format(*(to_source(n) for n in node[2:]))
+
+    source = to_source(node)
+    if params is None:
+        arguments = [*constant_names, "**_kwargs"]
+    else:
+        arguments = [*constant_names, *(f"_p{i}" for i in range(len(params)))]
+    namespace: dict[str, Any] = {}
+    exec(  # skipcq: PYL-W0122
+        compile(
+            f"def __expression__({', '.join(arguments)}):\n    return {source}\n",
+            "<spock expression>",
+            "exec",
+        ),
+        namespace,
+    )
+    func = _compiled_expressions[node] = namespace["__expression__"]
+    return func
+
+
 def declare(*param_names: str) -> tuple[Parameter, ...]:
     return tuple(Parameter(name) for name in param_names)
 
@@ -231,8 +363,11 @@ class AddArgumentsFailed(Exception):
 
 
 def zip_parameters_values(*params: Parameter) -> list[dict[str, Any]]:
+    return list(iter_parameters_values(*params))
+
+
+def iter_parameters_values(*params: Parameter) -> Iterator[dict[str, Any]]:
     max_len = max(len(param.__param_arguments__) for param in params)
-    result = []
     for i in range(max_len):
         arg = {}
         for param in params:
@@ -240,32 +375,99 @@ def zip_parameters_values(*params: Parameter) -> list[dict[str, Any]]:
                 arg[param.__name__] = param.__param_arguments__[i]
             except IndexError:
                 arg[param.__name__] = None
-        result.append(arg)
-
-    return result
+        yield arg
 
 
 def eval_params(**args: Any) -> dict[str, Any]:
-    expression_or_params = {}
-    normal_args = {}
-
-    for key, value in args.items():
-        if isinstance(value, (Expression, Parameter)):
-            expression_or_params[key] = value
-        else:
-            normal_args[key] = value
-
-    max_recursion_depth = 20
-    current_recursion_depth = 0
-    while expression_or_params:
-        tmp_expression_or_params = dict(**expression_or_params)
-        for key, f in tmp_expression_or_params.items():
+    return ParamsEvaluator()(args)
+
+
+class ParamsEvaluator:
+    """Evaluate the params of table rows which reference other params.
+
+    The evaluation order is worked out from the expression trees and cached by
+    the shape of the row, so all the rows of a table share one topological
+    sort.
+    """
+
+    def __init__(self) -> None:
+        self.orders: dict[tuple, tuple[str, ...]] = {}
+
+    def __call__(self, args: dict[str, Any]) -> dict[str, Any]:
+        """Evaluate the params of ``args`` in place and return it."""
+        dependencies: dict[str, tuple[str, ...] | None] = {}
+        for key, value in args.items():
+            if isinstance(value, Parameter):
+                dependencies[key] = (value.__name__,)
+            elif isinstance(value, Expression):
+                dependencies[key] = value.__params__
+        if not dependencies:
+            return args
+
+        shape = tuple(dependencies.items())
+        order = self.orders.get(shape)
+        if order is None:
+            order = self.orders[shape] = sort_params(args, dependencies)
+
+        # every param comes after its dependencies, so they are already
+        # evaluated in args when it is evaluated
+        for key in order:
+            value = args[key]
             try:
-                normal_args[key] = f(**normal_args)
-                expression_or_params.pop(key)
-            except (TypeError, KeyError):
-                current_recursion_depth += 1
-                if current_recursion_depth == max_recursion_depth:
-                    raise UnableEvalParams
-
-    return normal_args
+                if isinstance(value, Parameter):
+                    args[key] = args[value.__name__]
+                elif value.__params__ is None:
+                    args[key] = value.__compile__()(*value.__constants__, **args)
+                else:
+                    args[key] = value.__compile__()(
+                        *value.__constants__,
+                        *[args[name] for name in value.__params__],
+                    )
+            except Exception as e:
+                raise UnableEvalParams(
+                    f"failed to evaluate param {key!r}: {e!r}"
+                ) from e
+        return args
+
+
+def sort_params(
+    args: dict[str, Any], dependencies: dict[str, tuple[str, ...] | None]
+) -> tuple[str, ...]:
+    """Sort the params in ``dependencies`` so each comes after its dependencies.
+
+    Expressions with unknown dependencies depend on every other param which
+    has known dependencies.
+    """
+    resolved = {
+        key: deps
+        if deps is not None
+        else tuple(name for name in args if dependencies.get(name, ()) is not None)
+        for key, deps in dependencies.items()
+    }
+    for key, deps in resolved.items():
+        for name in deps:
+            if name not in args:
+                raise UnableEvalParams(
+                    f"param {key!r} references unknown param {name!r}"
+                )
+
+    order: list[str] = []
+    done: set[str] = set()
+    path: list[str] = []
+
+    def visit(key: str) -> None:
+        if key in done:
+            return
+        if key in path:
+            raise CyclicParamsError([*path[path.index(key) :], key])
+        path.append(key)
+        for name in resolved[key]:
+            if name in resolved:
+                visit(name)
+        path.pop()
+        done.add(key)
+        order.append(key)
+
+    for key in resolved:
+        visit(key)
+    return tuple(order)
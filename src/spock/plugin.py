@@ -1,16 +1,261 @@
+from typing import Optional
+
 import pytest
 
 from _pytest.config import Config
+from _pytest.config.argparsing import Parser
+from _pytest.nodes import Item
 from _pytest.python import PyCollector
+from _pytest.stash import StashKey
+from _pytest.terminal import TerminalReporter
 
+from .changed import CACHE_KEY as CHANGED_CACHE_KEY
+from .changed import ChangedRows
+from .changed import changed_rows_key
+from .dedupe import removed_duplicates_key
+from .durations import BlockDurations
+from .durations import block_durations_key
+from .event_loop import close_event_loop
+from .helper import BlocksDiskCache
+from .helper import set_blocks_disk_cache
+from .last_failed import CACHE_KEY as LAST_FAILED_CACHE_KEY
+from .last_failed import LastFailedRows
+from .last_failed import last_failed_key
+from .sample import Sample
+from .sample import sample_key
+from .shard import Shard
+from .shard import shard_key
+from .spock import SpockFunction
 from .spock import generate_spock_functions
+from .where_pool import WherePool
+from .where_pool import where_pool_key
+
+
+previous_blocks_disk_cache_key = StashKey[Optional[BlocksDiskCache]]()
+
+
+@pytest.hookimpl
+def pytest_addoption(parser: Parser):
+    group = parser.getgroup("spock")
+    group.addoption(
+        "--spock-shard",
+        dest="spock_shard",
+        metavar="INDEX/COUNT",
+        default=None,
+        help="only collect the spock iterations of shard INDEX (from 1) of COUNT.",
+    )
+    parser.addini(
+        "spock_shard",
+        help="default value for --spock-shard.",
+        default=None,
+    )
+    group.addoption(
+        "--spock-where-workers",
+        dest="spock_where_workers",
+        type=int,
+        metavar="N",
+        default=None,
+        help="evaluate the where blocks holding literal values only in N "
+        "worker processes during collection (0 to disable).",
+    )
+    parser.addini(
+        "spock_where_workers",
+        help="default value for --spock-where-workers.",
+        default=None,
+    )
+    group.addoption(
+        "--spock-changed",
+        dest="spock_changed",
+        action="store_true",
+        default=False,
+        help="skip the spock iterations which passed in a previous run with "
+        "--spock-changed, when neither their row nor their blocks changed.",
+    )
+    group.addoption(
+        "--spock-lf",
+        dest="spock_lf",
+        action="store_true",
+        default=False,
+        help="only evaluate and run the rows of the where tables which failed "
+        "in the last run, or every row when none failed.",
+    )
+    group.addoption(
+        "--spock-sample",
+        dest="spock_sample",
+        metavar="N|PCT%",
+        default=None,
+        help="only evaluate and run a random sample of N rows, or PCT percent "
+        "of the rows, of each where table, keeping at least one row.",
+    )
+    group.addoption(
+        "--spock-seed",
+        dest="spock_seed",
+        type=int,
+        metavar="SEED",
+        default=0,
+        help="seed of --spock-sample (default: 0), e.g. a build number to "
+        "sample other rows on every build.",
+    )
+    group.addoption(
+        "--spock-durations",
+        dest="spock_durations",
+        type=int,
+        metavar="N",
+        default=None,
+        help="show the block durations of the N slowest spock iterations "
+        "(N=0 for all) and the block totals of each spock function.",
+    )
+    group.addoption(
+        "--spock-durations-json",
+        dest="spock_durations_json",
+        metavar="PATH",
+        default=None,
+        help="write the block durations of every spock iteration to PATH.",
+    )
 
 
 @pytest.hookimpl
 def pytest_configure(config: Config):
     config.addinivalue_line(
-        "markers", "spock(msg): this marker means use spock test framework"
+        "markers",
+        "spock(msg, unroll=True, concurrency=1, threads=1, dedupe=False): this "
+        "marker means use spock test framework, with unroll=False every row of "
+        "the where table runs in a single test, with concurrency=N up to N rows "
+        "of it run at once on an event loop, with threads=N on N threads, with "
+        "dedupe=True duplicate rows are dropped and with dedupe='warn' reported",
     )
+    shard = config.getoption("spock_shard") or config.getini("spock_shard")
+    if shard:
+        try:
+            config.stash[shard_key] = Shard.parse(shard)
+        except ValueError as e:
+            raise pytest.UsageError(f"--spock-shard: {e}")
+    sample = config.getoption("spock_sample")
+    if sample:
+        try:
+            config.stash[sample_key] = Sample.parse(
+                sample, config.getoption("spock_seed")
+            )
+        except ValueError as e:
+            raise pytest.UsageError(f"--spock-sample: {e}")
+    if (
+        config.getoption("spock_durations") is not None
+        or config.getoption("spock_durations_json") is not None
+    ):
+        config.stash[block_durations_key] = BlockDurations()
+    where_workers = config.getoption("spock_where_workers")
+    option = "--spock-where-workers"
+    if where_workers is None:
+        where_workers = config.getini("spock_where_workers") or 0
+        option = "spock_where_workers"
+    try:
+        where_workers = int(where_workers)
+        if where_workers < 0:
+            raise ValueError
+    except ValueError:
+        raise pytest.UsageError(
+            f"{option}: invalid number of workers {where_workers!r}, expected N >= 0"
+        ) from None
+    if where_workers:
+        config.stash[where_pool_key] = WherePool(where_workers)
+    cache = getattr(config, "cache", None)
+    if cache is not None and config.getoption("spock_changed"):
+        changed = ChangedRows(cache.get(CHANGED_CACHE_KEY, {}))
+        config.stash[changed_rows_key] = changed
+        config.pluginmanager.register(changed, "spock-changed")
+    if cache is not None:
+        last_failed = LastFailedRows(
+            cache.get(LAST_FAILED_CACHE_KEY, {}), config.getoption("spock_lf")
+        )
+        config.stash[last_failed_key] = last_failed
+        config.pluginmanager.register(last_failed, "spock-last-failed")
+        config.stash[previous_blocks_disk_cache_key] = set_blocks_disk_cache(
+            BlocksDiskCache(cache.mkdir("spock_blocks"))
+        )
+
+
+@pytest.hookimpl
+def pytest_unconfigure(config: Config):
+    close_event_loop(config)
+    if where_pool_key in config.stash:
+        config.stash[where_pool_key].shutdown()
+    if previous_blocks_disk_cache_key not in config.stash:
+        return
+    disk_cache = set_blocks_disk_cache(config.stash[previous_blocks_disk_cache_key])
+    if disk_cache is not None:
+        disk_cache.flush()
+
+
+@pytest.hookimpl
+def pytest_report_collectionfinish(config: Config):
+    lines = []
+    last_failed = config.stash.get(last_failed_key, None)
+    if last_failed is not None and last_failed.active:
+        lines.append(f"spock: rerunning {len(last_failed.items)} failed rows")
+    removed_duplicates = config.stash.get(removed_duplicates_key, 0)
+    if removed_duplicates:
+        lines.append(f"spock: {removed_duplicates} duplicate rows removed")
+    changed = config.stash.get(changed_rows_key, None)
+    if changed is not None and changed.skipped:
+        lines.append(f"spock: {changed.skipped} unchanged iterations skipped")
+    return lines or None
+
+
+@pytest.hookimpl
+def pytest_report_header(config: Config):
+    lines = []
+    if shard_key in config.stash:
+        lines.append(f"spock shard: {config.stash[shard_key]}")
+    if sample_key in config.stash:
+        lines.append(f"spock sample: {config.stash[sample_key]}")
+    return lines or None
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_runtest_teardown(item: Item, nextitem: Optional[Item]):
+    if isinstance(item, SpockFunction):
+        try:
+            item.teardown_spec(nextitem)
+        finally:
+            item.record_durations()
+
+
+@pytest.hookimpl
+def pytest_terminal_summary(terminalreporter: TerminalReporter):
+    config = terminalreporter.config
+    count = config.getoption("spock_durations")
+    if count is None or block_durations_key not in config.stash:
+        return
+    durations = config.stash[block_durations_key]
+    if not durations.iterations:
+        return
+    if count:
+        terminalreporter.write_sep("=", f"slowest {count} spock iterations")
+    else:
+        terminalreporter.write_sep("=", "slowest spock iterations")
+    for line in durations.summary_lines(count):
+        terminalreporter.write_line(line)
+    terminalreporter.write_sep("-", "spock block durations per function")
+    for line in durations.spec_lines():
+        terminalreporter.write_line(line)
+
+
+@pytest.hookimpl
+def pytest_sessionfinish(session: pytest.Session):
+    config = session.config
+    # xdist workers send their reports to the controller, which saves them
+    is_worker = hasattr(config, "workerinput")
+    changed = config.stash.get(changed_rows_key, None)
+    if changed is not None and not is_worker:
+        changed.save(config.cache)  # type: ignore[union-attr]
+    last_failed = config.stash.get(last_failed_key, None)
+    if last_failed is not None and not is_worker:
+        last_failed.save(config.cache)  # type: ignore[union-attr]
+    path = config.getoption("spock_durations_json")
+    if path is not None and block_durations_key in config.stash:
+        config.stash[block_durations_key].write_json(
+            config.invocation_params.dir / path
+        )
 
 
 @pytest.hookimpl(tryfirst=True)
@@ -21,5 +266,23 @@ def pytest_pycollect_makeitem(collector: PyCollector, name: str, obj: object):
     if spock_marks:
         mark = spock_marks[0]
         message = mark.args[0] if mark.args else None
-        return list(generate_spock_functions(collector, name, obj, message))
+        where_pool = collector.config.stash.get(where_pool_key, None)
+        last_failed = collector.config.stash.get(last_failed_key, None)
+        arguments = None
+        # with --spock-lf, only the failed rows are evaluated in process
+        if where_pool is not None and not (last_failed and last_failed.active):
+            arguments = where_pool.result(collector, name)
+        return list(
+            generate_spock_functions(
+                collector,
+                name,
+                obj,
+                message,
+                unroll=mark.kwargs.get("unroll", True),
+                concurrency=mark.kwargs.get("concurrency", 1),
+                threads=mark.kwargs.get("threads", 1),
+                arguments=arguments,
+                dedupe=mark.kwargs.get("dedupe", False),
+            )
+        )
     return None
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import random
+
+from _pytest.stash import StashKey
+
+
+class Sample:
+    """Seeded random subset of the rows of each where table.
+
+    Each table is sampled on its own, from a random generator seeded with the
+    seed and the id of its spock function, so a table keeps the same rows
+    while its size does not change, whatever other tests are collected. A
+    table keeps at least one row.
+    """
+
+    def __init__(self, size: int | None, percent: float | None, seed: int) -> None:
+        self.size = size
+        self.percent = percent
+        self.seed = seed
+
+    @classmethod
+    def parse(cls, value: str, seed: int) -> Sample:
+        """Parse ``N`` rows per table, or ``PCT%`` of the rows of each table."""
+        try:
+            if value.endswith("%"):
+                percent = float(value[:-1])
+                if not 0 < percent <= 100:
+                    raise ValueError
+                return cls(None, percent, seed)
+            size = int(value)
+            if size < 1:
+                raise ValueError
+            return cls(size, None, seed)
+        except ValueError:
+            raise ValueError(
+                f"invalid sample {value!r}, expected a number of rows N >= 1 "
+                "or a percentage PCT% in (0, 100]"
+            ) from None
+
+    def __str__(self) -> str:
+        if self.size is not None:
+            return f"{self.size} rows per table (seed {self.seed})"
+        return f"{self.percent:g}% of each table (seed {self.seed})"
+
+    def indices(self, spec: str, count: int) -> set[int]:
+        """Return the indices of the rows to keep out of ``count`` rows."""
+        size = self.size
+        if size is None:
+            size = round(count * self.percent / 100)  # type: ignore[operator]
+        size = min(count, max(1, size))
+        return set(random.Random(f"{self.seed}:{spec}").sample(range(count), size))
+
+
+sample_key = StashKey[Sample]()
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import zlib
+
+from _pytest.stash import StashKey
+
+
+class Shard:
+    """Deterministic split of the spock iterations across machines.
+
+    An iteration belongs to the shard selected by the crc32 of its node id,
+    so every machine agrees on the split without talking to the others.
+    """
+
+    def __init__(self, index: int, count: int) -> None:
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError(f"invalid shard {index}/{count}")
+        self.index = index
+        self.count = count
+
+    @classmethod
+    def parse(cls, value: str) -> Shard:
+        """Parse ``INDEX/COUNT``, where INDEX starts from 1."""
+        try:
+            index, count = (int(part) for part in value.split("/"))
+        except ValueError:
+            raise ValueError(f"invalid shard {value!r}, expected INDEX/COUNT")
+        return cls(index, count)
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    def __contains__(self, nodeid: str) -> bool:
+        return zlib.crc32(nodeid.encode()) % self.count == self.index - 1
+
+
+shard_key = StashKey[Shard]()
@@ -1,113 +1,523 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import functools
+import inspect
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
 from typing import TYPE_CHECKING
+from typing import TypeVar
 
 from _pytest import fixtures
+from _pytest import timing
 from _pytest._code.code import Code
 from _pytest._code.code import ExceptionInfo
+from _pytest._code.code import ReprFileLocation
+from _pytest._code.code import TerminalRepr
+from _pytest.outcomes import fail
 from _pytest.python import CallSpec2
 from _pytest.python import Function
 from _pytest.python import Module
 from _pytest.python import PyCollector
 from _pytest.scope import Scope
-
+from _pytest.warning_types import PytestCollectionWarning
+
+from .changed import blocks_fingerprint
+from .changed import changed_rows_key
+from .dedupe import DuplicateRows
+from .dedupe import removed_duplicates_key
+from .durations import block_durations_key
+from .event_loop import get_event_loop
+from .exceptions import IterationsFailed
+from .exceptions import SetupSpecError
 from .exceptions import UnableEvalParams
 from .helper import Box
-from .helper import get_functions_in_function
+from .helper import get_blocks_factory
+from .ids import IdTemplate
+from .last_failed import last_failed_key
 from .param_table import ParamTable
 from .parameter import Parameter
-from .parameter import eval_params
-from .parameter import zip_parameters_values
+from .parameter import ParamsEvaluator
+from .parameter import iter_parameters_values
+from .sample import sample_key
+from .shard import shard_key
 
 
 if TYPE_CHECKING:
+    from collections.abc import Collection
+    from collections.abc import Coroutine
     from collections.abc import Iterable
+    from collections.abc import Iterator
     from typing import Any
     from typing import Callable
 
+    from _pytest._io import TerminalWriter
+    from _pytest.config import Config
+    from _pytest.nodes import Item
+
+
+T = TypeVar("T")
+
+
+class SpockPlan:
+    """Execution plan of a spock function, shared by all of its iterations.
+
+    Blocks and their argument names are resolved once at collection, so
+    running an iteration does not need any introspection. Each iteration
+    gets fresh blocks from :meth:`new_blocks`, which runs the body of the
+    function again, so values of the body are not shared between rows.
+    """
+
+    def __init__(self, func: Callable) -> None:
+        self.func = func
+        self.new_blocks = get_blocks_factory(func)
+        blocks = self.new_blocks()
+        self.block_names = tuple(blocks)
+        self.where_block = blocks.get("where")
+        self.argnames: dict[str, tuple[str, ...]] = {
+            name: tuple(Code.from_function(block).getargs())
+            for name, block in blocks.items()
+        }
+        self.given_needs_me = "me" in self.argnames.get("given", ())
+        self.then_needs_excinfo = "excinfo" in self.argnames.get("then", ())
+        self.has_assertions = "expect" in blocks or "then" in blocks
+        self.async_blocks = frozenset(
+            name for name, block in blocks.items() if inspect.iscoroutinefunction(block)
+        )
 
-class SpockFunction(Function):
-    def setup(self) -> None:
-        super().setup()
+        fixturenames: dict[str, None] = {}
+        for block_name in ["when", "then", "expect", "cleanup"]:
+            for argname in self.argnames.get(block_name, ()):
+                if argname != "excinfo":
+                    fixturenames[argname] = None
+        self.fixturenames = tuple(fixturenames)
+
+        self.spec_blocks: dict[str, Callable] | None = None
+        self.spec_values: dict[str, Any] | None = None
+        self.cleanup_values: dict[str, Any] | None = None
+        self.spec_error: Exception | None = None
+
+    def drive(self, coro: Coroutine[Any, Any, T], config: Config) -> T:
+        """Run a coroutine of the plan to completion.
+
+        Without async blocks the coroutine never suspends and is stepped once,
+        otherwise it runs on the event loop of the plugin.
+        """
+        if self.async_blocks:
+            if threading.current_thread() is not threading.main_thread():
+                # rows run on a thread pool get an event loop of their own
+                return asyncio.run(coro)
+            return get_event_loop(config).run_until_complete(coro)
+        try:
+            coro.send(None)
+        except StopIteration as e:
+            return e.value
+        coro.close()
+        raise RuntimeError("spock blocks suspended outside of the event loop")
+
+    async def call(
+        self,
+        blocks: dict[str, Callable],
+        block_name: str,
+        values: dict[str, Any],
+        durations: dict[str, float] | None = None,
+    ) -> Any:
+        """Call a block, adding its duration to ``durations`` if given."""
+        args = [values[arg] for arg in self.argnames[block_name]]
+        is_async = block_name in self.async_blocks
+        if durations is None:
+            if is_async:
+                return await blocks[block_name](*args)
+            return blocks[block_name](*args)
+
+        start = timing.perf_counter()
+        try:
+            if is_async:
+                return await blocks[block_name](*args)
+            return blocks[block_name](*args)
+        finally:
+            durations[block_name] = (
+                durations.get(block_name, 0.0) + timing.perf_counter() - start
+            )
 
-        testfunc = self.obj
-        blocks = get_functions_in_function(testfunc)
+    async def setup(
+        self,
+        blocks: dict[str, Callable],
+        funcargs: dict[str, Any],
+        getfixturevalue: Callable[[str], Any],
+        getspecfixturevalue: Callable[[str], Any],
+        durations: dict[str, float] | None = None,
+    ) -> None:
+        """Run the given block and resolve the fixtures of the other blocks."""
+        spec_values = await self.setup_spec(blocks, getspecfixturevalue, durations)
+        for argname, value in spec_values.items():
+            funcargs.setdefault(argname, value)
 
         if "given" in blocks:
-            given_func = blocks["given"]
-            given_argnames = Code.from_function(given_func).getargs()
-            given_args = {}
-            for argname in given_argnames:
+            me = Box()
+            given_args: dict[str, Any] = {}
+            for argname in self.argnames["given"]:
                 if argname == "me":
-                    given_args["me"] = Box()
+                    given_args["me"] = me
+                elif argname in funcargs:
+                    given_args[argname] = funcargs[argname]
                 else:
-                    arg = self._request.getfixturevalue(argname)
-                    self.funcargs[argname] = arg
+                    arg = getfixturevalue(argname)
+                    funcargs[argname] = arg
                     given_args[argname] = arg
 
-            given_func(**given_args)
-            if given_args["me"]:
-                self.funcargs.update(given_args["me"]._data)
+            await self.call(blocks, "given", given_args, durations)
+            if self.given_needs_me:
+                funcargs.update(me._data)
+
+        for argname in self.fixturenames:
+            if argname not in funcargs:
+                funcargs[argname] = getfixturevalue(argname)
+
+    async def setup_spec(
+        self,
+        blocks: dict[str, Callable],
+        getspecfixturevalue: Callable[[str], Any],
+        durations: dict[str, float] | None = None,
+    ) -> dict[str, Any]:
+        """Run the setup_spec block once for all iterations.
+
+        Return the values it sets on ``me``, which are passed to the other
+        blocks of every iteration. The fixtures of cleanup_spec are resolved
+        here too, while they are still set up.
+        """
+        if self.spec_error is not None:
+            error = self.spec_error
+            raise SetupSpecError(
+                f"setup_spec failed: {type(error).__name__}: {error}"
+            ) from error
+        if self.spec_values is not None:
+            return self.spec_values
+
+        me = Box()
+        fixtures: dict[str, Any] = {}
+        try:
+            if "setup_spec" in blocks:
+                for argname in self.argnames["setup_spec"]:
+                    if argname != "me":
+                        fixtures[argname] = getspecfixturevalue(argname)
+                await self.call(blocks, "setup_spec", {**fixtures, "me": me}, durations)
+            spec_values = dict(me._data)
+            values = {**fixtures, **spec_values}
+            cleanup_values = {
+                argname: values[argname]
+                if argname in values
+                else getspecfixturevalue(argname)
+                for argname in self.argnames.get("cleanup_spec", ())
+            }
+        except Exception as e:
+            self.spec_error = e
+            raise
+        self.spec_blocks = blocks
+        self.spec_values = spec_values
+        self.cleanup_values = cleanup_values
+        return spec_values
+
+    async def cleanup_spec(self, durations: dict[str, float] | None = None) -> None:
+        """Run the cleanup_spec block after the last iteration."""
+        blocks, self.spec_blocks = self.spec_blocks, None
+        cleanup_values, self.cleanup_values = self.cleanup_values, None
+        self.spec_values = None
+        self.spec_error = None
+        if blocks is not None and "cleanup_spec" in blocks:
+            assert cleanup_values is not None
+            await self.call(blocks, "cleanup_spec", cleanup_values, durations)
+
+    async def run(
+        self,
+        blocks: dict[str, Callable],
+        funcargs: dict[str, Any],
+        durations: dict[str, float] | None = None,
+    ) -> None:
+        """Run the expect, when and then blocks."""
+        if not self.has_assertions:
+            raise RuntimeError("No `expect` or `then` block found")
 
-        for block_name in ["when", "then", "expect", "cleanup"]:
-            block_func = blocks.get(block_name)
-            if block_func is None:
-                continue
-            block_argnames = Code.from_function(block_func).getargs()
-            for argname in block_argnames:
-                if argname not in self.funcargs:
-                    if argname == "excinfo":
-                        continue
-                    self.funcargs[argname] = self._request.getfixturevalue(argname)
+        if "expect" in blocks:
+            await self.call(blocks, "expect", funcargs, durations)
+
+        if "when" in blocks:
+            excinfo: ExceptionInfo | None = None
+            try:
+                await self.call(blocks, "when", funcargs, durations)
+            except:  # noqa: E722
+                excinfo = ExceptionInfo.from_current()
+
+            if "then" not in blocks:
+                return
+            if self.then_needs_excinfo:
+                funcargs = {**funcargs, "excinfo": excinfo}
+            await self.call(blocks, "then", funcargs, durations)
+
+    async def cleanup(
+        self,
+        blocks: dict[str, Callable],
+        funcargs: dict[str, Any],
+        durations: dict[str, float] | None = None,
+    ) -> None:
+        if "cleanup" in blocks:
+            await self.call(blocks, "cleanup", funcargs, durations)
+
+
+class SpockFunction(Function):
+    def __init__(
+        self, *args: Any, plan: SpockPlan | None = None, **kwargs: Any
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.plan = plan
+        self.blocks: dict[str, Callable] = {}
+        self.block_durations: dict[str, float] | None = None
+
+    @property
+    def spec_id(self) -> str:
+        """Node id of the spock function, without the iteration id."""
+        return f"{self.parent.nodeid}::{self.originalname}"  # type: ignore
+
+    def setup(self) -> None:
+        super().setup()
+
+        plan = self.plan
+        if plan is None:
+            # the where block failed to evaluate this iteration
+            self.obj()
+            return
+
+        if block_durations_key in self.config.stash:
+            self.block_durations = {}
+        self.blocks = plan.new_blocks()
+        plan.drive(
+            plan.setup(
+                self.blocks,
+                self.funcargs,
+                self.getfixturevalue,
+                self.getspecfixturevalue,
+                self.block_durations,
+            ),
+            self.config,
+        )
+
+    def getfixturevalue(self, argname: str) -> Any:
+        return self._request.getfixturevalue(argname)
+
+    def getspecfixturevalue(self, argname: str) -> Any:
+        """Return a fixture of setup_spec or cleanup_spec.
+
+        They are shared by every iteration, so function scoped fixtures, which
+        are torn down after the first iteration, are rejected.
+        """
+        value = self.getfixturevalue(argname)
+        fixturedef = self._request._fixture_defs.get(argname)
+        if fixturedef is not None and fixturedef.scope == "function":
+            raise ValueError(
+                f"setup_spec and cleanup_spec can't take the function scoped "
+                f"fixture {argname!r}, its value would be shared by every "
+                "iteration; use a fixture of a wider scope"
+            )
+        return value
 
     def teardown(self) -> None:
         super().teardown()
-        testfunc = self.obj
-        if testfunc.__name__ == "__spock_failed__":
+        plan = self.plan
+        if plan is None:
             return
-        blocks = get_functions_in_function(testfunc)
 
-        if "cleanup" not in blocks:
+        plan.drive(
+            plan.cleanup(self.blocks, self.funcargs, self.block_durations),
+            self.config,
+        )
+
+    def runtest(self) -> None:
+        plan = self.plan
+        assert plan is not None
+        plan.drive(
+            plan.run(self.blocks, self.funcargs, self.block_durations),
+            self.config,
+        )
+
+    def teardown_spec(self, nextitem: Item | None) -> None:
+        """Run the cleanup_spec block unless ``nextitem`` is of the same spec."""
+        plan = self.plan
+        if plan is None:
+            return
+        if isinstance(nextitem, SpockFunction) and nextitem.plan is plan:
             return
+        plan.drive(plan.cleanup_spec(self.block_durations), self.config)
 
-        cleanup_func = blocks["cleanup"]
-        cleanup_argnames = Code.from_function(cleanup_func).getargs()
-        funcargs = self.funcargs
-        cleanup_args = {arg: funcargs[arg] for arg in cleanup_argnames}
-        cleanup_func(**cleanup_args)
+    def record_durations(self) -> None:
+        """Add the durations of the blocks of this iteration to the session."""
+        if self.block_durations is not None:
+            self.config.stash[block_durations_key].add(
+                self.nodeid, self.spec_id, self.block_durations
+            )
 
-    def runtest(self) -> None:
-        testfunc = self.obj
-        blocks = get_functions_in_function(testfunc)
 
-        if "expect" not in blocks and "then" not in blocks:
-            raise RuntimeError("No `expect` or `then` block found")
+class RolledSpockFunction(SpockFunction):
+    """Spock function running every row of its where table in one item.
+
+    Like the iterations of a spock feature which is not unrolled, each row
+    runs its given, when, then, expect and cleanup blocks. The item fails
+    once when any row failed, its report showing each failed row under its
+    own header. With a ``concurrency`` above 1, up to that many rows
+    are run at once on the event loop of the plugin, with ``threads`` above 1
+    the rows are run on a pool of that many threads.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        rows: list[tuple[str, dict[str, Any] | UnableEvalParams]],
+        concurrency: int = 1,
+        threads: int = 1,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.rows = rows
+        self.concurrency = concurrency
+        self.threads = threads
+        self.fixture_lock = threading.Lock()
+        self.failed_rows: list[tuple[str, Any]] = []
 
-        if "expect" in blocks:
-            expect_func = blocks["expect"]
-            expect_argnames = Code.from_function(expect_func).getargs()
-            funcargs = self.funcargs
-            testargs = {arg: funcargs[arg] for arg in expect_argnames}
-            expect_func(**testargs)
+    def setup(self) -> None:
+        Function.setup(self)
 
-        if "when" in blocks:
-            when_func = blocks["when"]
-            funcargs = dict(self.funcargs)
-            when_argnames = Code.from_function(when_func).getargs()
-            when_args = {arg: funcargs[arg] for arg in when_argnames}
-            excinfo: ExceptionInfo | None = None
+    def teardown(self) -> None:
+        Function.teardown(self)
+
+    def runtest(self) -> None:
+        if self.concurrency > 1:
+            loop = get_event_loop(self.config)
+            self.report_rows(loop.run_until_complete(self.run_rows()))
+        elif self.threads > 1:
+            # setup_spec runs once before the rows, its error is raised again
+            # by every row
+            with contextlib.suppress(Exception):
+                self.drive(self.setup_spec())
+            with ThreadPoolExecutor(
+                self.threads, thread_name_prefix="spock"
+            ) as executor:
+                self.report_rows(
+                    executor.map(lambda row: self.drive(self.run_row(*row)), self.rows)
+                )
+        else:
+            self.report_rows(self.drive(self.run_row(*row)) for row in self.rows)
+
+    def drive(self, coro: Coroutine[Any, Any, T]) -> T:
+        plan = self.plan
+        assert plan is not None
+        return plan.drive(coro, self.config)
+
+    def getfixturevalue(self, argname: str) -> Any:
+        # fixtures of the item are shared by rows which may run on threads
+        with self.fixture_lock:
+            return self._request.getfixturevalue(argname)
+
+    def report_rows(self, results: Iterable[ExceptionInfo | None]) -> None:
+        self.failed_rows = []
+        failed_ids = []
+        for (row_id, argument), excinfo in zip(self.rows, results):
+            if excinfo is None:
+                continue
+            failed_ids.append(row_id)
+            longrepr: Any
+            if isinstance(argument, UnableEvalParams):
+                longrepr = f"{row_id}: {argument}"
+            else:
+                longrepr = self.repr_failure(excinfo)
+            self.failed_rows.append((f"{self.name}[{row_id}]", longrepr))
+
+        if failed_ids:
+            raise IterationsFailed(failed_ids, len(self.rows))
+
+    async def setup_spec(self) -> dict[str, Any]:
+        plan = self.plan
+        assert plan is not None
+        return await plan.setup_spec(plan.new_blocks(), self.getspecfixturevalue)
+
+    async def run_rows(self) -> list[ExceptionInfo | None]:
+        """Run the rows concurrently, at most ``concurrency`` at a time."""
+        plan = self.plan
+        assert plan is not None
+        with contextlib.suppress(Exception):
+            await self.setup_spec()
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_row(
+            row_id: str, argument: dict[str, Any] | UnableEvalParams
+        ) -> ExceptionInfo | None:
+            async with semaphore:
+                return await self.run_row(row_id, argument)
+
+        return await asyncio.gather(*(run_row(*row) for row in self.rows))
+
+    async def run_row(
+        self, row_id: str, argument: dict[str, Any] | UnableEvalParams
+    ) -> ExceptionInfo | None:
+        """Run the blocks of a row, return its error if any."""
+        plan = self.plan
+        assert plan is not None
+        durations: dict[str, float] | None = None
+        if block_durations_key in self.config.stash:
+            durations = {}
+        excinfo: ExceptionInfo | None = None
+        try:
+            if isinstance(argument, UnableEvalParams):
+                raise argument
+            blocks = plan.new_blocks()
+            funcargs = dict(argument)
             try:
-                when_func(**when_args)
-            except:  # noqa: E722
-                excinfo = ExceptionInfo.from_current()
+                await plan.setup(
+                    blocks,
+                    funcargs,
+                    self.getfixturevalue,
+                    self.getspecfixturevalue,
+                    durations,
+                )
+                await plan.run(blocks, funcargs, durations)
+            finally:
+                await plan.cleanup(blocks, funcargs, durations)
+        except (Exception, fail.Exception):
+            excinfo = ExceptionInfo.from_current()
+        finally:
+            if durations is not None:
+                self.config.stash[block_durations_key].add(
+                    f"{self.nodeid}[{row_id}]", self.spec_id, durations
+                )
+        return excinfo
+
+    def repr_failure(self, excinfo: ExceptionInfo[BaseException]) -> Any:
+        if isinstance(excinfo.value, IterationsFailed):
+            path, lineno, _ = self.location
+            return IterationsFailedRepr(
+                ReprFileLocation(path, (lineno or 0) + 1, str(excinfo.value)),
+                self.failed_rows,
+            )
+        return super().repr_failure(excinfo)
 
-            then_func = blocks.get("then")
-            if then_func is None:
-                return
-            funcargs["excinfo"] = excinfo
-            then_argnames = Code.from_function(then_func).getargs()
-            then_args = {arg: funcargs[arg] for arg in then_argnames}
-            then_func(**then_args)
+
+class IterationsFailedRepr(TerminalRepr):
+    """Failure of a rolled spock function, showing each failed row in turn."""
+
+    def __init__(self, reprcrash: ReprFileLocation, rows: list[tuple[str, Any]]):
+        self.reprcrash = reprcrash
+        self.rows = rows
+
+    def toterminal(self, tw: TerminalWriter) -> None:
+        for head_line, longrepr in self.rows:
+            tw.sep("-", head_line)
+            if isinstance(longrepr, TerminalRepr):
+                longrepr.toterminal(tw)
+            else:
+                tw.line(str(longrepr))
+        tw.sep("-")
+        self.reprcrash.toterminal(tw)
 
 
 def generate_spock_functions(
@@ -115,108 +525,283 @@ def generate_spock_functions(
     name: str,
     obj: object,
     message: str | None,
+    unroll: bool = True,
+    concurrency: int = 1,
+    threads: int = 1,
+    arguments: Iterable[dict[str, Any] | UnableEvalParams] | None = None,
+    dedupe: bool | str = False,
 ) -> Iterable[SpockFunction]:
-    blocks = get_functions_in_function(obj)  # type: ignore
-    where_block = blocks.get("where")
+    """Generate the items of a spock function.
+
+    ``arguments`` are the rows of its where block when they were evaluated
+    beforehand, otherwise the where block is evaluated here. With ``dedupe``,
+    rows equal to an earlier row are dropped, or only warned about with
+    ``dedupe="warn"``.
+    """
+    for option, value in [("concurrency", concurrency), ("threads", threads)]:
+        if not isinstance(value, int) or value < 1:
+            raise ValueError(f"{option} must be a positive integer, got {value!r}")
+    if concurrency > 1 and threads > 1:
+        raise ValueError("concurrency and threads can't be used together")
+    if dedupe not in (False, True, "warn"):
+        raise ValueError(f"dedupe must be True, False or 'warn', got {dedupe!r}")
+    unroll = unroll and concurrency == 1 and threads == 1
+    shard = collector.config.stash.get(shard_key, None)
+    plan = SpockPlan(obj)  # type: ignore
+    where_block = plan.where_block
+    rolled = where_block is None or not unroll
+    if rolled and shard is not None and f"{collector.nodeid}::{name}" not in shard:
+        return
     if where_block is None:
         yield SpockFunction.from_parent(
             collector,
             name=name,
             callobj=obj,
+            plan=plan,
         )
         return
 
-    argnames = tuple(n for n in Code.from_function(where_block).getargs() if n != "_")
+    template = IdTemplate(message)
+    duplicates = DuplicateRows(drop=dedupe is True) if dedupe else None
+    sample = collector.config.stash.get(sample_key, None)
+    pick_rows = None
+    if sample is not None:
+        pick_rows = functools.partial(sample.indices, f"{collector.nodeid}::{name}")
+    if not unroll:
+        indexed_arguments = select_arguments(where_block, arguments, sample=pick_rows)
+        if duplicates is not None:
+            indexed_arguments = duplicates.filter(indexed_arguments)
+        rows = [
+            (get_row_id(template, idx, argument), argument)
+            for idx, argument in indexed_arguments
+        ]
+        report_duplicates(collector, name, duplicates)
+        yield RolledSpockFunction.from_parent(
+            collector,
+            name=name,
+            callobj=obj,
+            plan=plan,
+            rows=rows,
+            concurrency=concurrency,
+            threads=threads,
+        )
+        return
+
+    argnames = tuple(n for n in plan.argnames["where"] if n != "_")
     module_col = collector.getparent(Module)
     if module_col is None:
         raise ValueError("module can't be None")  # pragma: no cover
 
-    for idx, argument in enumerate(generate_arguments(where_block)):
+    # every iteration shares the fixture info and one fixture per column,
+    # which returns the value of the column from the callspec of the item
+    fixtureinfo = fixtures.FuncFixtureInfo(
+        argnames=argnames,
+        initialnames=argnames,
+        names_closure=list(argnames),
+        name2fixturedefs={
+            argname: [
+                fixtures.FixtureDef(
+                    config=collector.config,
+                    baseid=collector.nodeid,
+                    argname=argname,
+                    params=None,
+                    func=get_column_value,
+                    scope="function",
+                    _ispytest=True,
+                )
+            ]
+            for argname in argnames
+        },
+    )
+    arg2scope = dict.fromkeys(argnames, Scope.Function)
+
+    spec = f"{collector.nodeid}::{name}"
+    changed = collector.config.stash.get(changed_rows_key, None)
+    blocks_hash = blocks_fingerprint(obj) if changed is not None else None  # type: ignore
+    last_failed = collector.config.stash.get(last_failed_key, None)
+    failed_rows = last_failed.failed_rows(spec) if last_failed is not None else None
+    if failed_rows is not None and not failed_rows:
+        return
+
+    indexed_arguments: Iterable[tuple[int, dict[str, Any] | UnableEvalParams]]
+    indexed_arguments = select_arguments(
+        where_block, arguments, failed_rows, sample=pick_rows
+    )
+    if failed_rows is not None:
+        indexed_arguments = list(indexed_arguments)
+        # the table changed since the last run if a failed row moved, so
+        # every row is run again
+        if len(indexed_arguments) != len(failed_rows) or any(
+            failed_rows[idx] != get_row_id(template, idx, argument)
+            for idx, argument in indexed_arguments
+        ):
+            indexed_arguments = select_arguments(
+                where_block, arguments, sample=pick_rows
+            )
+    if duplicates is not None:
+        indexed_arguments = duplicates.filter(indexed_arguments)
+
+    for idx, argument in indexed_arguments:
+        row_id = get_row_id(template, idx, argument)
+        id = f"{name}[{row_id}]"
+        nodeid = f"{collector.nodeid}::{id}"
+        if shard is not None and nodeid not in shard:
+            continue
         if isinstance(argument, UnableEvalParams):
 
-            def __spock_failed__(idx: int = idx) -> None:  # noqa: N807
-                raise ValueError(
-                    f"Unable to eval index {idx} params"
-                )  # pragma: no cover
+            def __spock_failed__(  # noqa: N807
+                idx: int = idx, error: UnableEvalParams = argument
+            ) -> None:
+                message = f"Unable to eval index {idx} params: {error}"
+                raise ValueError(message) from error
 
-            id = f"{name}[unable to eval {idx} params]"
+            if last_failed is not None:
+                last_failed.add(nodeid, spec, idx, row_id)
             yield SpockFunction.from_parent(
                 collector,
                 name=id,
                 callobj=__spock_failed__,
-                keywords={id: True},
                 originalname=name,
             )
         else:
-            try:
-                id = message.format(**argument)  # type: ignore
-            except (AttributeError, KeyError):
-                id = "-".join(map(str, argument.values()))
-
-            id = f"{name}[{id}]"
-
-            def get_arg(argname):
-                value = argument[argname]  # type: ignore # noqa: B023
-                return lambda: value
-
-            fixtureinfo = fixtures.FuncFixtureInfo(
-                argnames=argnames,
-                initialnames=argnames,
-                names_closure=list(argnames),
-                name2fixturedefs={
-                    argname: [
-                        fixtures.FixtureDef(
-                            config=collector.config,
-                            baseid=name,
-                            argname=argname,
-                            params=None,
-                            func=get_arg(argname),
-                            scope="function",
-                            _ispytest=True,
-                        )
-                    ]
-                    for argname in argnames
-                },
-            )
-            callspec = CallSpec2()
-            callspec = callspec.setmulti(
-                argnames=argnames,
-                valset=argument.values(),
-                id=id,
-                marks=[],
-                scope=Scope.Function,
-                param_index=idx,
-                nodeid=collector.nodeid,
+            if (
+                changed is not None
+                and blocks_hash is not None
+                and changed.is_unchanged(spec, blocks_hash, nodeid, argument)
+            ):
+                continue
+            if last_failed is not None:
+                last_failed.add(nodeid, spec, idx, row_id)
+
+            callspec = CallSpec2(
+                params=argument,
+                indices=dict.fromkeys(argnames, idx),
+                _arg2scope=arg2scope,
+                _idlist=(row_id,),
             )
-
             yield SpockFunction.from_parent(
                 collector,
                 name=id,
                 callspec=callspec,
                 callobj=obj,
                 fixtureinfo=fixtureinfo,
-                keywords={id: True},
                 originalname=name,
+                plan=plan,
+            )
+    report_duplicates(collector, name, duplicates)
+
+
+def report_duplicates(
+    collector: PyCollector, name: str, duplicates: DuplicateRows | None
+) -> None:
+    if duplicates is None or not duplicates.duplicates:
+        return
+    count = len(duplicates.duplicates)
+    if duplicates.drop:
+        stash = collector.config.stash
+        stash[removed_duplicates_key] = stash.get(removed_duplicates_key, 0) + count
+    else:
+        collector.warn(
+            PytestCollectionWarning(
+                f"{name} has {count} duplicate rows in its where table, "
+                f"at indices {duplicates.duplicates}"
             )
+        )
 
 
-def generate_arguments(func: Callable) -> list[dict[str, Any] | UnableEvalParams]:
+def get_column_value(request: fixtures.SubRequest) -> Any:
+    return request.param
+
+
+def get_row_id(
+    template: IdTemplate, idx: int, argument: dict[str, Any] | UnableEvalParams
+) -> str:
+    if isinstance(argument, UnableEvalParams):
+        return f"unable to eval {idx} params"
+    return template.render(argument)
+
+
+def select_arguments(
+    func: Callable,
+    arguments: Iterable[dict[str, Any] | UnableEvalParams] | None,
+    indices: Collection[int] | None = None,
+    sample: Callable[[int], Collection[int]] | None = None,
+) -> Iterator[tuple[int, dict[str, Any] | UnableEvalParams]]:
+    """Yield the index and arguments of the rows at ``indices``, or all rows.
+
+    ``arguments`` are the rows evaluated beforehand, otherwise only the
+    selected rows of the where block ``func`` are evaluated. ``sample`` picks
+    the indices from the number of rows, when ``indices`` is None.
+    """
+    if arguments is None:
+        return iter_indexed_arguments(func, indices, sample)
+    if indices is None and sample is not None:
+        arguments = list(arguments)
+        indices = sample(len(arguments))
+    return (
+        (idx, argument)
+        for idx, argument in enumerate(arguments)
+        if indices is None or idx in indices
+    )
+
+
+def generate_arguments(
+    func: Callable, indices: Collection[int] | None = None
+) -> list[dict[str, Any] | UnableEvalParams]:
+    return [argument for _, argument in iter_indexed_arguments(func, indices)]
+
+
+def iter_arguments(func: Callable) -> Iterator[dict[str, Any] | UnableEvalParams]:
+    """Evaluate the where block ``func`` and yield the arguments of each row.
+
+    Rows are converted and evaluated lazily, one at a time.
+    """
+    for _, argument in iter_indexed_arguments(func):
+        yield argument
+
+
+def iter_indexed_arguments(
+    func: Callable,
+    indices: Collection[int] | None = None,
+    sample: Callable[[int], Collection[int]] | None = None,
+) -> Iterator[tuple[int, dict[str, Any] | UnableEvalParams]]:
+    """Yield the index and arguments of the rows of the where block ``func``.
+
+    With ``indices``, only the rows at these indices are evaluated. Otherwise
+    ``sample`` may pick them from the number of rows, counted before any row
+    is evaluated.
+    """
     code = Code.from_function(func)
     arg_names = code.getargs()
 
     if "_" not in arg_names:
         params = {arg: Parameter(arg) for arg in arg_names}
         func(**params)
-        return zip_parameters_values(*params.values())  # type: ignore
+        if indices is None and sample is not None:
+            indices = sample(
+                max(
+                    (len(param.__param_arguments__) for param in params.values()),
+                    default=0,
+                )
+            )
+        for idx, argument in enumerate(iter_parameters_values(*params.values())):  # type: ignore
+            if indices is None or idx in indices:
+                yield idx, argument
+        return
     params = {arg: Parameter(arg) for arg in {*arg_names} - {"_"}}
     table = ParamTable()
     params["_"] = table  # type: ignore
     func(**params)
-    args = table.to_dict()
-    result: list[dict[str, Any] | UnableEvalParams] = []
-    for arg in args:
+    if indices is None and sample is not None:
+        indices = sample(sum(1 for _ in table))
+    evaluate = ParamsEvaluator()
+    last = None if indices is None else max(indices, default=-1)
+    for idx, arg in enumerate(table.iter_dicts()):
+        if last is not None and idx > last:
+            return
+        if indices is not None and idx not in indices:
+            continue
         try:
-            result.append(eval_params(**arg))
+            yield idx, evaluate(arg)
         except UnableEvalParams as e:
-            result.append(e)
-    return result
+            yield idx, e
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import csv
+import json
+import mmap
+import os
+
+from abc import ABC
+from abc import abstractmethod
+from typing import TYPE_CHECKING
+from typing import Any
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+    from collections.abc import Mapping
+    from typing import Callable
+
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+class TableSource(ABC):
+    """Rows of a where table, generated lazily.
+
+    A source is bound to the columns of a table section with ``<<``::
+
+        def where(_, a, b):
+            _ | a | b
+            _ << table_from_csv("cases.csv", converters={"a": int})
+    """
+
+    @abstractmethod
+    def rows(self, names: Iterable[str]) -> Iterator[tuple[Any, ...]]:
+        """Yield the values of the ``names`` columns of each row."""
+
+
+class FileTableSource(TableSource):
+    """Rows of a where table read lazily from a file."""
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        converters: Mapping[str, Callable[[Any], Any]] | None = None,
+        encoding: str = "utf-8",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> None:
+        self.path = os.fspath(path)
+        self.converters = dict(converters or {})
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.path!r})"
+
+    def iter_lines(self) -> Iterator[str]:
+        """Yield the decoded lines of the file, read in chunks from an mmap."""
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pending = b""
+                for offset in range(0, len(mm), self.chunk_size):
+                    lines = (pending + mm[offset : offset + self.chunk_size]).split(
+                        b"\n"
+                    )
+                    pending = lines.pop()
+                    for line in lines:
+                        yield (line + b"\n").decode(self.encoding)
+                if pending:
+                    yield pending.decode(self.encoding)
+
+    def convert(self, names: tuple[str, ...], values: list[Any]) -> tuple[Any, ...]:
+        converters = self.converters
+        if not converters:
+            return tuple(values)
+        return tuple(
+            converters[name](value)
+            if name in converters and value is not None
+            else value
+            for name, value in zip(names, values)
+        )
+
+
+class CSVTableSource(FileTableSource):
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        converters: Mapping[str, Callable[[Any], Any]] | None = None,
+        encoding: str = "utf-8",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        header: bool = True,
+        **fmtparams: Any,
+    ) -> None:
+        super().__init__(path, converters, encoding, chunk_size)
+        self.header = header
+        self.fmtparams = fmtparams
+
+    def rows(self, names: Iterable[str]) -> Iterator[tuple[Any, ...]]:
+        names = tuple(names)
+        reader = csv.reader(self.iter_lines(), **self.fmtparams)
+        if self.header:
+            header = next(reader, [])
+            missing = [name for name in names if name not in header]
+            if missing:
+                raise ValueError(f"columns {missing} not found in {self.path}")
+            indexes = [header.index(name) for name in names]
+        else:
+            indexes = list(range(len(names)))
+
+        for record in reader:
+            if not record:
+                continue
+            values = [record[i] if i < len(record) else None for i in indexes]
+            yield self.convert(names, values)
+
+
+class JSONLinesTableSource(FileTableSource):
+    def rows(self, names: Iterable[str]) -> Iterator[tuple[Any, ...]]:
+        names = tuple(names)
+        for line in self.iter_lines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield self.convert(names, [record.get(name) for name in names])
+
+
+def table_from_csv(
+    path: str | os.PathLike,
+    converters: Mapping[str, Callable[[Any], Any]] | None = None,
+    *,
+    encoding: str = "utf-8",
+    header: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    **fmtparams: Any,
+) -> CSVTableSource:
+    """Read where table rows from a csv file.
+
+    Columns are picked by name from the csv header, or by position when
+    ``header`` is False. Values are strings unless a converter is given for
+    their column. ``fmtparams`` are passed to :func:`csv.reader`.
+    """
+    return CSVTableSource(
+        path,
+        converters,
+        encoding=encoding,
+        chunk_size=chunk_size,
+        header=header,
+        **fmtparams,
+    )
+
+
+def table_from_jsonl(
+    path: str | os.PathLike,
+    converters: Mapping[str, Callable[[Any], Any]] | None = None,
+    *,
+    encoding: str = "utf-8",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> JSONLinesTableSource:
+    """Read where table rows from a file holding one json object per line.
+
+    Columns are picked by key, missing keys are None and are not converted.
+    """
+    return JSONLinesTableSource(
+        path, converters, encoding=encoding, chunk_size=chunk_size
+    )
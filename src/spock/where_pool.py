@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import ast
+import inspect
+import logging
+
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Union
+
+from _pytest.stash import StashKey
+
+from .exceptions import UnableEvalParams
+from .helper import locate_function_node
+from .spock import generate_arguments
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from _pytest.python import PyCollector
+
+
+logger = logging.getLogger(__name__)
+
+Arguments = list[Union[dict[str, Any], UnableEvalParams]]
+
+
+class WherePool:
+    """Evaluate the where blocks of a collector in worker processes.
+
+    When the first spock function of a module or class is collected, the
+    where blocks of all of its spock functions holding literal values only
+    are sent to the pool, and the main process goes on creating the items
+    of the first ones while the others are evaluated.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self.executor: ProcessPoolExecutor | None = None
+
+    def result(self, collector: PyCollector, name: str) -> Arguments | None:
+        """Return the rows of the where block of ``name``, if it was sent."""
+        futures = collector.stash.get(where_futures_key, None)
+        if futures is None:
+            futures = collector.stash[where_futures_key] = self.submit(collector)
+        future = futures.pop(name, None)
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except Exception:
+            # evaluate it again in process, to raise its error from the tests
+            logger.warning(
+                "evaluating the where block of %s in a worker failed",
+                name,
+                exc_info=True,
+            )
+            return None
+
+    def submit(self, collector: PyCollector) -> dict[str, Future[Arguments]]:
+        futures = {}
+        for name, obj in vars(collector.obj).items():
+            if not (
+                inspect.isfunction(obj)
+                and collector.funcnamefilter(name)
+                and any(mark.name == "spock" for mark in getattr(obj, "pytestmark", []))
+            ):
+                continue
+            source = get_literal_where_source(obj)
+            if source is None:
+                continue
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(self.workers)
+            futures[name] = self.executor.submit(evaluate_where_source, source)
+        return futures
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+
+def get_literal_where_source(func: Callable) -> str | None:
+    """Return the source of the where block of ``func`` if it is literal only.
+
+    A literal where block only holds table rows or ``<<`` assignments whose
+    values are literals or its own params, so it can be run from its source
+    alone and its rows can be sent back from a worker process.
+    """
+    node = locate_function_node(func.__code__)
+    if node is None:
+        return None
+    where = next(
+        (
+            block
+            for block in node.body
+            if isinstance(block, ast.FunctionDef) and block.name == "where"
+        ),
+        None,
+    )
+    if where is None or where.decorator_list or not is_literal_where(where):
+        return None
+    return ast.unparse(where)
+
+
+def is_literal_where(where: ast.FunctionDef) -> bool:
+    args = where.args
+    if args.posonlyargs or args.vararg or args.kwonlyargs or args.kwarg:
+        return False
+    names = {arg.arg for arg in args.args}
+
+    def is_cell(node: ast.expr) -> bool:
+        if isinstance(node, ast.Name):
+            return node.id in names
+        try:
+            ast.literal_eval(node)
+        except Exception:
+            return False
+        return True
+
+    def is_row(node: ast.expr) -> bool:
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+            return is_row(node.left) and is_cell(node.right)
+        return is_cell(node)
+
+    for statement in where.body:
+        if isinstance(statement, ast.Pass):
+            continue
+        if not isinstance(statement, ast.Expr) or not isinstance(
+            statement.value, ast.BinOp
+        ):
+            return False
+        value = statement.value
+        if isinstance(value.op, ast.LShift):
+            if not (isinstance(value.left, ast.Name) and is_cell(value.right)):
+                return False
+        elif not is_row(value):
+            return False
+    return True
+
+
+def evaluate_where_source(source: str) -> Arguments:
+    """Run the where block ``source`` and return the arguments of its rows."""
+    namespace: dict[str, Any] = {}
+    exec(compile(source, "<spock where>", "exec"), {}, namespace)
+    return generate_arguments(namespace["where"])
+
+
+where_pool_key = StashKey[WherePool]()
+where_futures_key = StashKey[dict[str, Future]]()
@@ -0,0 +1,198 @@
+import json
+
+from _pytest.reports import TestReport
+
+from spock.changed import ChangedRows
+
+
+def test_spock_changed(pytester):
+    source = """
+        import pytest
+
+        @pytest.mark.spock("{a}")
+        def test_spock():
+            def expect(a, b):
+                assert a < b
+
+            def where(_, a, b):
+                _ | a | b
+                _ | 1 | 2
+                _ | 3 | 0
+                _ | 5 | 6
+        """
+    pytester.makepyfile(test_changed=source)
+    result = pytester.runpytest("--spock-changed")
+    result.assert_outcomes(passed=2, failed=1)
+
+    result = pytester.runpytest("--spock-changed", "-v")
+    result.assert_outcomes(failed=1)
+    result.stdout.fnmatch_lines(
+        ["spock: 2 unchanged iterations skipped", "*::test_spock[[]3[]] FAILED*"]
+    )
+
+    # fix the failing row
+    source = source.replace("_ | 3 | 0", "_ | 3 | 4")
+    pytester.makepyfile(test_changed=source)
+    result = pytester.runpytest("--spock-changed", "-v")
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(["*::test_spock[[]3[]] PASSED*"])
+
+    result = pytester.runpytest("--spock-changed")
+    result.assert_outcomes()
+    result.stdout.fnmatch_lines(["spock: 3 unchanged iterations skipped"])
+
+    # changing a block runs every row again
+    pytester.makepyfile(test_changed=source.replace("a < b", "a <= b"))
+    result = pytester.runpytest("--spock-changed")
+    result.assert_outcomes(passed=3)
+
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=3)
+
+
+def test_spock_changed_hashes_row_content(pytester):
+    pytester.makepyfile(
+        test_changed="""
+        import pytest
+
+        class Frame:
+            def __init__(self, values):
+                self.values = values
+
+            def __repr__(self):
+                return f"Frame({self.values[:3]} ... {self.values[-3:]})"
+
+        VALUES = list(range(100))
+
+        def nothing():
+            return None
+
+        @pytest.mark.spock("{a}")
+        def test_spock():
+            def expect(a, frame, func):
+                assert frame.values == VALUES
+                assert func() is None
+
+            def where(_, a, frame, func):
+                _ | a | frame         | func
+                _ | 1 | Frame(VALUES) | (lambda: None)
+                _ | 2 | Frame(VALUES) | nothing
+        """
+    )
+    result = pytester.runpytest("--spock-changed")
+    result.assert_outcomes(passed=2)
+
+    # the lambda can't be hashed, so its row always runs
+    result = pytester.runpytest("--spock-changed", "-v")
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(["*::test_spock[[]1[]] PASSED*"])
+
+    # the repr of the frame is the same, its content is not
+    test_file = pytester.path / "test_changed.py"
+    test_file.write_text(
+        test_file.read_text().replace("VALUES = list(range(100))", "VALUES = [0] * 100")
+    )
+    result = pytester.runpytest("--spock-changed")
+    result.assert_outcomes(passed=2)
+
+
+def test_spock_changed_replaces_fingerprints(pytester):
+    source = """
+        import pytest
+
+        @pytest.mark.spock("{a}")
+        def test_spock():
+            def expect(a, b):
+                assert a < b
+
+            def where(_, a, b):
+                _ | a | b
+                _ | 1 | 2
+                _ | 3 | 4
+                _ | 5 | 6
+        """
+    pytester.makepyfile(test_changed=source)
+    pytester.runpytest("--spock-changed").assert_outcomes(passed=3)
+    pytester.makepyfile(test_changed=source.replace("_ | 3 | 4", "_ | 3 | 7"))
+    pytester.runpytest("--spock-changed").assert_outcomes(passed=1)
+    pytester.makepyfile(test_changed=source.replace("_ | 3 | 4", "_ | 3 | 0"))
+    pytester.runpytest("--spock-changed").assert_outcomes(failed=1)
+
+    cache = json.loads(
+        (pytester.path / ".pytest_cache/v/spock/fingerprints").read_text()
+    )
+    assert list(cache["test_changed.py::test_spock"]) == [
+        "test_changed.py::test_spock[1]",
+        "test_changed.py::test_spock[5]",
+    ]
+
+
+def test_spock_changed_merges_cache(pytester):
+    pytester.makepyfile(
+        test_changed="""
+        import pytest
+
+        @pytest.mark.spock("{a}")
+        def test_spock():
+            def expect(a, b):
+                assert a < b
+
+            def where(_, a, b):
+                _ | a | b
+                _ | 1 | 2
+                _ | 3 | 4
+                _ | 5 | 6
+        """
+    )
+    for shard in ["1/3", "2/3", "3/3"]:
+        result = pytester.runpytest("--spock-changed", f"--spock-shard={shard}")
+        result.assert_outcomes(passed=1)
+
+    # the shards add their fingerprints to each other's
+    result = pytester.runpytest("--spock-changed")
+    result.assert_outcomes()
+    result.stdout.fnmatch_lines(["spock: 3 unchanged iterations skipped"])
+
+
+def test_spock_changed_not_saved_by_workers(pytester):
+    pytester.makeconftest(
+        """
+        def pytest_configure(config):
+            config.workerinput = {}
+        """
+    )
+    pytester.makepyfile(
+        test_changed="""
+        import pytest
+
+        @pytest.mark.spock("{a}")
+        def test_spock():
+            def expect(a, b):
+                assert a < b
+
+            def where(_, a, b):
+                _ | a | b
+                _ | 1 | 2
+                _ | 3 | 4
+                _ | 5 | 6
+        """
+    )
+    pytester.runpytest("--spock-changed").assert_outcomes(passed=3)
+    pytester.runpytest("--spock-changed").assert_outcomes(passed=3)
+
+
+def test_fingerprint_sent_with_reports():
+    report = TestReport(
+        nodeid="test_changed.py::test_spock[1]",
+        location=("test_changed.py", 4, "test_spock[1]"),
+        keywords={},
+        outcome="passed",
+        longrepr=None,
+        when="teardown",
+        spock_fingerprint=("test_changed.py::test_spock", "fingerprint"),
+    )
+    changed = ChangedRows({})
+    changed.pytest_runtest_logreport(TestReport._from_json(report._to_json()))
+    assert changed.results == {
+        "test_changed.py::test_spock": {"test_changed.py::test_spock[1]": "fingerprint"}
+    }
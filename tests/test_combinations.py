@@ -0,0 +1,85 @@
+import itertools
+
+import pytest
+
+from spock import pairwise
+from spock import product
+from spock.combinations import pairwise_indices
+from spock.param_table import ParamTable
+from spock.parameter import declare
+from spock.parameter import eval_params
+
+
+def test_product_rows():
+    source = product(a=[1, 2], b="xy")
+    assert list(source.rows(["a", "b"])) == [(1, "x"), (1, "y"), (2, "x"), (2, "y")]
+    assert list(source.rows(["b", "a"])) == [("x", 1), ("x", 2), ("y", 1), ("y", 2)]
+
+
+def test_combinations_columns_must_match():
+    with pytest.raises(ValueError, match=r"don't match the columns \['a', 'b'\]"):
+        product(a=[1], b=[2]).rows(["a", "c"])
+    with pytest.raises(ValueError):
+        pairwise(a=[1], b=[2]).rows(["a"])
+
+
+@pytest.mark.parametrize(
+    "sizes", [[10, 10, 10, 10], [3, 3, 3, 3], [2] * 10, [5, 4, 3, 2], [4, 1, 3]]
+)
+def test_pairwise_covers_every_pair(sizes):
+    rows = list(pairwise_indices(sizes))
+    for a, b in itertools.combinations(range(len(sizes)), 2):
+        assert {(row[a], row[b]) for row in rows} == set(
+            itertools.product(range(sizes[a]), range(sizes[b]))
+        )
+    assert rows == list(pairwise_indices(sizes))
+
+
+def test_pairwise_rows():
+    rows = list(pairwise(**{name: range(10) for name in "abcd"}).rows("abcd"))
+    assert len(rows) <= 120
+    assert list(pairwise(a=[1, 2]).rows(["a"])) == [(1,), (2,)]
+    assert list(pairwise(a=[1, 2], b=[]).rows(["a", "b"])) == []
+
+
+def test_table_with_product():
+    a, b, c = declare("a", "b", "c")
+    table = ParamTable()
+    table | a | b | c
+    table << product(a=[1, 2], b=[a, 0], c=["x"])
+
+    assert [eval_params(**row) for row in table.iter_dicts()] == [
+        {"a": 1, "b": 1, "c": "x"},
+        {"a": 1, "b": 0, "c": "x"},
+        {"a": 2, "b": 2, "c": "x"},
+        {"a": 2, "b": 0, "c": "x"},
+    ]
+
+
+def test_spock_function_with_pairwise(pytester):
+    pytester.makepyfile(
+        """
+        import pytest
+        import spock
+
+        @pytest.mark.spock("{a}-{b}-{c}")
+        def test_spock():
+            def expect(a, b, c):
+                assert (a, b, c) != (2, 2, 2)
+
+            def where(_, a, b, c):
+                _ | a | b | c
+                _ << spock.pairwise(a=[0, 1, 2], b=[0, 1, 2], c=[0, 1, 2])
+        """
+    )
+    result = pytester.runpytest("--co", "-q")
+    rows = [
+        tuple(line.split("[")[1].rstrip("]").split("-"))
+        for line in result.outlines
+        if "::test_spock[" in line
+    ]
+    assert 9 <= len(rows) < 27
+    for a, b in itertools.combinations(range(3), 2):
+        assert {(row[a], row[b]) for row in rows} == set(
+            itertools.product("012", repeat=2)
+        )
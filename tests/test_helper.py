@@ -1,7 +1,13 @@
 # ruff: noqa: RUF012
 
+import importlib
+import os
+
 import pytest
 
+from spock.helper import BlocksDiskCache
+from spock.helper import compile_blocks_code
+from spock.helper import get_blocks_code
 from spock.helper import get_function_names
 from spock.helper import get_functions_in_function
 
@@ -60,21 +66,21 @@ def test_get_functions_in_method():
     obj = Class()
     funcs = get_functions_in_function(obj.a)
     assert funcs["func"]() == 1 + obj.data1
-    assert funcs["func"].__code__.co_firstlineno == 40
+    assert funcs["func"].__code__.co_firstlineno == 46
     assert funcs["func"].__code__.co_filename == __file__
 
 
 def test_get_functions_in_classmethod():
     funcs = get_functions_in_function(Class.b)
     assert funcs["func"]() == [3, *Class.data2]
-    assert funcs["func"].__code__.co_firstlineno == 50
+    assert funcs["func"].__code__.co_firstlineno == 56
     assert funcs["func"].__code__.co_filename == __file__
 
 
 def test_get_functions_in_staticmethod():
     funcs = get_functions_in_function(Class.c)
     assert funcs["func"]() == "abc"
-    assert funcs["func"].__code__.co_firstlineno == 55
+    assert funcs["func"].__code__.co_firstlineno == 61
     assert funcs["func"].__code__.co_filename == __file__
 
 
@@ -127,3 +133,126 @@ def test_box():
     box._c = 4.5
     assert box._data == {"a": 1, "b": "123"}
     assert box.a == 1  # type: ignore
+    assert box._c == 4.5  # type: ignore
+    assert not hasattr(box, "__dict__")
+
+    del box.a
+    assert box._data == {"b": "123"}
+    with pytest.raises(AttributeError):
+        box.a  # type: ignore  # noqa: B018
+    with pytest.raises(AttributeError):
+        box._d  # type: ignore  # noqa: B018
+
+
+def leak_local_var():
+    leaked_data = 1
+
+    def func():
+        return leaked_data
+
+
+def test_blocks_not_leak_into_module_globals():
+    funcs = get_functions_in_function(leak_local_var)
+    assert funcs["func"]() == 1
+    assert "leaked_data" not in globals()
+    assert "func" not in globals()
+
+
+def test_blocks_code_is_cached():
+    assert get_blocks_code(func1) is get_blocks_code(func1)
+    funcs1 = get_functions_in_function(func1)
+    funcs2 = get_functions_in_function(func1)
+    assert funcs1["a"] is not funcs2["a"]
+    assert funcs1["a"].__code__ is funcs2["a"].__code__
+
+
+def test_blocks_code_invalidated_when_file_changes(tmp_path, monkeypatch):
+    module_file = tmp_path / "spock_changed_module.py"
+    module_file.write_text("def test():\n    def a():\n        return 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module = importlib.import_module("spock_changed_module")
+    assert get_functions_in_function(module.test)["a"]() == 1
+
+    module_file.write_text("def test():\n    def a():\n        return 22\n")
+    stat = os.stat(module_file)
+    os.utime(module_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert get_functions_in_function(module.test)["a"]() == 22
+
+
+def test_blocks_disk_cache(tmp_path):
+    code = func1.__code__
+    blocks_code = compile_blocks_code(func1)
+
+    disk_cache = BlocksDiskCache(tmp_path)
+    assert disk_cache.load(code, False) is None
+    disk_cache.store(code, False, blocks_code)
+    disk_cache.flush()
+    assert len(list(tmp_path.iterdir())) == 1
+
+    loaded = BlocksDiskCache(tmp_path).load(code, False)
+    assert loaded == blocks_code
+    assert loaded.co_filename == __file__
+
+
+def test_blocks_disk_cache_invalidated_when_source_changes(tmp_path, monkeypatch):
+    module_file = tmp_path / "spock_cached_module.py"
+    module_file.write_text("def test():\n    def a():\n        return 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module = importlib.import_module("spock_cached_module")
+    code = module.test.__code__
+
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    disk_cache = BlocksDiskCache(cache_dir)
+    disk_cache.store(code, False, compile_blocks_code(module.test))
+    disk_cache.flush()
+
+    module_file.write_text("def test():\n    def a():\n        return 22\n")
+    assert BlocksDiskCache(cache_dir).load(code, False) is None
+
+
+def test_blocks_disk_cache_used_by_plugin(pytester):
+    pytester.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.spock
+        def test_spock():
+            def expect():
+                assert 1 == 1
+        """
+    )
+    pytester.runpytest().assert_outcomes(passed=1)
+    cache_files = list((pytester.path / ".pytest_cache/d/spock_blocks").iterdir())
+    assert len(cache_files) == 1
+
+    pytester.runpytest().assert_outcomes(passed=1)
+
+
+def decorator(*_):
+    return lambda func: func
+
+
+@decorator(
+    "def not_a_block(): ...",
+)
+def decorated_function(
+    a=(
+        1,
+        2,
+    ),
+):
+    """def in docstring"""
+
+    def block():
+        return [i * 2 for i in range(2)]
+
+
+def test_get_functions_in_decorated_function():
+    funcs = get_functions_in_function(decorated_function)
+    assert list(funcs) == ["block"]
+    assert funcs["block"]() == [0, 2]
+    assert (
+        funcs["block"].__code__.co_firstlineno
+        == decorated_function.__code__.co_firstlineno + 11
+    )
@@ -0,0 +1,74 @@
+from spock.ids import MAX_VALUE_LENGTH
+from spock.ids import IdTemplate
+from spock.ids import content_hash
+
+
+class Frame:
+    """Large value whose repr leaves out the middle, like numpy arrays."""
+
+    def __init__(self, values):
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return f"Frame({self.values[:3]} ... {self.values[-3:]})"
+
+
+def test_render_message():
+    template = IdTemplate("{a} + {b!r:>4} = {c[0]}")
+    assert template.render({"a": 1, "b": "x", "c": [3]}) == "1 +  'x' = 3"
+
+
+def test_render_fallback():
+    assert IdTemplate(None).render({"a": 1, "b": "x"}) == "1-x"
+    assert IdTemplate("{missing}").render({"a": 1, "b": "x"}) == "1-x"
+
+
+def test_render_oversized_values():
+    big = list(range(10_000))
+    template = IdTemplate("{a}-{b}")
+    row_id = template.render({"a": big, "b": 1})
+    assert row_id.startswith("list#")
+    assert row_id.endswith("-1")
+    assert len(row_id) < MAX_VALUE_LENGTH
+    # the hash is stable
+    assert template.render({"a": list(range(10_000)), "b": 1}) == row_id
+    assert template.render({"a": big[:-1], "b": 1}) != row_id
+
+    row_id = IdTemplate(None).render({"a": b"x" * 1000, "b": 10**100})
+    assert row_id.startswith("bytes#")
+    assert "-int#" in row_id
+
+
+def test_render_oversized_values_by_content():
+    values = list(range(1000))
+    changed = [*values[:500], -1, *values[501:]]
+    assert repr(Frame(values)) == repr(Frame(changed))
+    row_id = IdTemplate(None).render({"a": Frame(values)})
+    assert row_id.startswith("Frame#")
+    assert IdTemplate(None).render({"a": Frame(list(values))}) == row_id
+    assert IdTemplate(None).render({"a": Frame(changed)}) != row_id
+
+    text = "x" * 500
+    assert IdTemplate(None).render({"a": text}) != IdTemplate(None).render(
+        {"a": text[:250] + "y" + text[251:]}
+    )
+
+
+def test_content_hash():
+    assert content_hash([1, "a", b"b", (None, 1.5)], 6) == content_hash(
+        [1, "a", b"b", (None, 1.5)], 6
+    )
+    assert content_hash([1], 6) != content_hash([True], 6)
+    assert content_hash([1], 6) != content_hash((1,), 6)
+    assert content_hash(["ab", "c"], 6) != content_hash(["a", "bc"], 6)
+    assert content_hash({"a", "b", "c"}, 6) == content_hash({"c", "b", "a"}, 6)
+    assert content_hash({"a": 1}, 6) != content_hash({"a": 2}, 6)
+    assert content_hash(-(10**5000), 6) != content_hash(10**5000, 6)
+
+    cyclic: list = []
+    cyclic.append(cyclic)
+    assert content_hash(cyclic, 6) is None
+    assert content_hash(lambda: None, 6) is None
@@ -0,0 +1,146 @@
+from _pytest.reports import TestReport
+
+from spock.last_failed import LastFailedRows
+from spock.spock import generate_arguments
+
+
+def test_spock_last_failed(pytester):
+    source = """
+        import pytest
+
+        @pytest.mark.spock("{a}")
+        def test_spock():
+            def expect(a, b):
+                assert a < b
+
+            def where(_, a, b):
+                _ | a | b
+                _ | 1 | 2
+                _ | 3 | 0
+                _ | 5 | 6
+        """
+    pytester.makepyfile(test_lf=source)
+    result = pytester.runpytest("--spock-lf")
+    result.assert_outcomes(passed=2, failed=1)
+
+    # only the failed row runs
+    result = pytester.runpytest("--spock-lf", "-v")
+    result.assert_outcomes(failed=1)
+    result.stdout.fnmatch_lines(
+        ["spock: rerunning 1 failed rows", "*::test_spock[[]3[]] FAILED*"]
+    )
+
+    # every row runs again when the failed row moved
+    source = """
+        import pytest
+
+        @pytest.mark.spock("{a}")
+        def test_spock():
+            def expect(a, b):
+                assert a < b
+
+            def where(_, a, b):
+                _ | a | b
+                _ | 0 | 1
+                _ | 1 | 2
+                _ | 3 | 0
+                _ | 5 | 6
+        """
+    pytester.makepyfile(test_lf=source)
+    result = pytester.runpytest("--spock-lf")
+    result.assert_outcomes(passed=3, failed=1)
+
+    pytester.makepyfile(test_lf=source.replace("_ | 3 | 0", "_ | 3 | 4"))
+    result = pytester.runpytest("--spock-lf")
+    result.assert_outcomes(passed=1)
+
+    # nothing failed in the last run, every row runs
+    result = pytester.runpytest("--spock-lf")
+    result.assert_outcomes(passed=4)
+
+
+def test_spock_last_failed_keeps_rows_which_did_not_run(pytester):
+    pytester.makepyfile(
+        test_lf="""
+        import pytest
+
+        @pytest.mark.spock("{a}")
+        def test_spock():
+            def expect(a, b):
+                assert a < b
+
+            def where(_, a, b):
+                _ | a | b
+                _ | 1 | 2
+                _ | 3 | 0
+                _ | 5 | 6
+        """,
+        test_other="def test_other():\n    pass\n",
+    )
+    pytester.runpytest().assert_outcomes(passed=3, failed=1)
+
+    # specs which are not collected or not run keep their failed rows
+    pytester.runpytest("test_other.py").assert_outcomes(passed=1)
+    pytester.runpytest("-k", "test_spock and 5").assert_outcomes(passed=1)
+    result = pytester.runpytest("--spock-lf", "test_lf.py")
+    result.assert_outcomes(failed=1)
+
+
+def test_spock_last_failed_not_saved_by_workers(pytester):
+    pytester.makeconftest(
+        """
+        def pytest_configure(config):
+            config.workerinput = {}
+        """
+    )
+    pytester.makepyfile(
+        test_lf="""
+        import pytest
+
+        @pytest.mark.spock("{a}")
+        def test_spock():
+            def expect(a, b):
+                assert a < b
+
+            def where(_, a, b):
+                _ | a | b
+                _ | 1 | 2
+                _ | 3 | 0
+                _ | 5 | 6
+        """
+    )
+    pytester.runpytest().assert_outcomes(passed=2, failed=1)
+    pytester.runpytest("--spock-lf").assert_outcomes(passed=2, failed=1)
+
+
+def test_row_sent_with_reports():
+    report = TestReport(
+        nodeid="test_lf.py::test_spock[3]",
+        location=("test_lf.py", 4, "test_spock[3]"),
+        keywords={},
+        outcome="failed",
+        longrepr="AssertionError",
+        when="call",
+        spock_row=("test_lf.py::test_spock", 1, "3"),
+    )
+    last_failed = LastFailedRows({}, active=False)
+    last_failed.pytest_runtest_logreport(TestReport._from_json(report._to_json()))
+    assert last_failed.results == {"test_lf.py::test_spock": {1: "3"}}
+
+
+def test_generate_arguments_indices():
+    def where(_, a, b):
+        _ | a | b
+        _ | b | a
+        _ | 1 | a + 1
+        _ | 2 | a * 2
+        _ | 3 | a * 3
+
+    assert generate_arguments(where, {1, 2}) == [{"a": 1, "b": 2}, {"a": 2, "b": 4}]
+    assert generate_arguments(where, ()) == []
+
+    def where(a, b):
+        a << [1, 2, 3]
+        b << [4, 5, 6]
+
+    assert generate_arguments(where, {0, 2}) == [{"a": 1, "b": 4}, {"a": 3, "b": 6}]
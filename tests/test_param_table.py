@@ -98,6 +98,20 @@ class TestParamTable:
             {"a": 7, "b": 8, "c": 9},
         ]
 
+    def test_table_iter_dicts(
+        self, table: ParamTable, a: Parameter, b: Parameter, c: Parameter
+    ):
+        table | a | b
+        table | 1 | 2
+        table | 4 | 5
+        table | c
+        table | 3
+
+        rows = table.iter_dicts()
+        assert next(rows) == {"a": 1, "b": 2, "c": 3}
+        assert next(rows) == {"a": 4, "b": 5, "c": None}
+        assert next(rows, None) is None
+
     def test_table_to_dict_with_params(
         self, table: ParamTable, a: Parameter, b: Parameter, c: Parameter
     ):
@@ -116,3 +130,41 @@ class TestParamTable:
             {"a": b, "b": 5, "c": 6},
             {"a": 7, "b": 8, "c": a + 2},
         ]
+
+    def test_table_names(
+        self, table: ParamTable, a: Parameter, b: Parameter, c: Parameter
+    ):
+        table | a | b
+        table | 1 | 2
+        table | c
+
+        assert table.names == ("a", "b", "c")
+        assert list(table) == [(1, 2, None)]
+
+    def test_accept_expression_enabled_at_end_of_header(
+        self, table: ParamTable, a: Parameter, b: Parameter, c: Parameter
+    ):
+        table | a | b
+        assert not a.__accept_expression__
+        table | 1 | 2
+        assert a.__accept_expression__
+        assert b.__accept_expression__
+
+        table | c
+        assert not c.__accept_expression__
+        table | a + 1
+        assert c.__accept_expression__
+
+        assert table.to_dict()[0]["c"](a=1) == 2
+
+    def test_wide_table(self, table: ParamTable):
+        params = [Parameter(f"p{i}") for i in range(60)]
+        for param in params:
+            table | param
+        for row in range(100):
+            for i in range(60):
+                table | row * i
+
+        rows = list(table)
+        assert len(rows) == 100
+        assert rows[3] == tuple(3 * i for i in range(60))
@@ -3,6 +3,7 @@ from typing import Callable
 
 import pytest
 
+from spock.exceptions import CyclicParamsError
 from spock.exceptions import UnableEvalParams
 from spock.parameter import AddArgumentsFailed
 from spock.parameter import BuildExpressionError
@@ -145,6 +146,45 @@ def test_multi_expression():
     assert (exp1 - 5 + exp2 * 3)(a=20, b=3) == (15 + 9)
 
 
+def test_expression_compiled_into_flat_function():
+    a, b, c = declare("a", "b", "c")
+    for param in (a, b, c):
+        param.__accept_expression__ = True
+
+    exp = a + b * 2 - c
+    assert exp.__params__ == ("a", "b", "c")
+    assert exp.__constants__ == (2,)
+    assert exp.__compile__()(2, 1, 2, 3) == 2
+    assert exp(a=1, b=2, c=3, d=4) == 2
+    with pytest.raises(KeyError):
+        exp(a=1, b=2)
+
+
+def test_expression_factories_shared_by_shape():
+    a, b = declare("a", "b")
+    a.__accept_expression__ = True
+
+    exp1, exp2 = a + 1, a + 5
+    assert exp1(a=1) == 2
+    assert exp2(a=1) == 6
+    assert exp1.__compile__() is exp2.__compile__()
+    assert (a + b).__compile__() is not exp1.__compile__()
+
+
+def test_expression_with_parameter_operand():
+    a, b = declare("a", "b")
+    a.__accept_expression__ = True
+
+    assert ((a + 1) * b)(a=1, b=3) == 6
+    assert (a == None)(a=None) is True  # noqa: E711
+
+
+def test_expression_with_call_node():
+    exp = Expression(lambda a, **_: a) + 1
+    assert exp.__params__ is None
+    assert exp(a=1, b=2) == 2
+
+
 def test_zip_parameters_values():
     a, b = declare("a", "b")
     a << [1, 2, 3, 4]
@@ -199,3 +239,67 @@ def test_eval_params_failed():
     }
     with pytest.raises(UnableEvalParams):
         eval_params(**params)
+
+
+def test_eval_params_in_dependency_order():
+    a, b, c = declare("a", "b", "c")
+    for param in (a, b, c):
+        param.__accept_expression__ = True
+
+    params = {"d": c * 2, "c": b + a, "b": a + 1, "a": 1}
+    assert list(eval_params(**params).items()) == [
+        ("d", 6),
+        ("c", 3),
+        ("b", 2),
+        ("a", 1),
+    ]
+
+
+def test_eval_params_with_call_expression():
+    a, b = declare("a", "b")
+    a.__accept_expression__ = True
+
+    params = {"c": Expression(lambda a, b, **_: a * b), "b": a + 1, "a": 3}
+    assert eval_params(**params) == {"c": 12, "b": 4, "a": 3}
+
+
+def test_eval_params_cycle():
+    a, b, c = declare("a", "b", "c")
+    for param in (a, b, c):
+        param.__accept_expression__ = True
+
+    params = {"a": 1, "b": c + 1, "c": b * a}
+    with pytest.raises(CyclicParamsError) as excinfo:
+        eval_params(**params)
+    assert excinfo.value.names == ["b", "c", "b"]
+    assert str(excinfo.value) == "cyclic references between params: b -> c -> b"
+
+
+def test_eval_params_unknown_param():
+    a, d = declare("a", "d")
+    d.__accept_expression__ = True
+
+    with pytest.raises(UnableEvalParams, match="'a' references unknown param 'd'"):
+        eval_params(a=d + 1)
+
+
+def test_eval_params_expression_error():
+    a, b = declare("a", "b")
+    a.__accept_expression__ = True
+
+    with pytest.raises(UnableEvalParams, match="failed to evaluate param 'b'") as e:
+        eval_params(a="1", b=a + 1)
+    assert isinstance(e.value.__cause__, TypeError)
+
+
+def test_params_evaluator_sorts_once_per_shape():
+    from spock.parameter import ParamsEvaluator
+
+    a, b = declare("a", "b")
+    a.__accept_expression__ = True
+
+    evaluate = ParamsEvaluator()
+    assert evaluate({"a": 1, "b": a + 1}) == {"a": 1, "b": 2}
+    assert evaluate({"a": 5, "b": a + 2}) == {"a": 5, "b": 7}
+    assert evaluate({"a": 5, "b": 3}) == {"a": 5, "b": 3}
+    assert list(evaluate.orders.values()) == [("b",)]
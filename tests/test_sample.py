@@ -0,0 +1,83 @@
+import pytest
+
+from spock.sample import Sample
+
+
+def test_parse():
+    assert Sample.parse("10", 1).size == 10
+    assert Sample.parse("2.5%", 1).percent == 2.5
+    for value in ["0", "-1", "0%", "101%", "x", "%"]:
+        with pytest.raises(ValueError, match="invalid sample"):
+            Sample.parse(value, 0)
+
+
+def test_indices():
+    sample = Sample.parse("10%", 0)
+    assert len(sample.indices("spec", 1000)) == 100
+    assert len(sample.indices("spec", 3)) == 1
+    assert sample.indices("spec", 0) == set()
+    assert sample.indices("spec", 1000) == sample.indices("spec", 1000)
+    assert sample.indices("spec", 1000) != sample.indices("other", 1000)
+    assert sample.indices("spec", 1000) != Sample.parse("10%", 1).indices("spec", 1000)
+    assert Sample.parse("5", 0).indices("spec", 3) == {0, 1, 2}
+
+
+def collected(pytester, *args):
+    result = pytester.runpytest(*args, "--co", "-q")
+    return [line for line in result.outlines if "::" in line]
+
+
+def test_spock_sample(pytester):
+    pytester.makepyfile(
+        test_sample="""
+        import pytest
+
+        EVALUATED = []
+
+        @pytest.mark.spock("{a}")
+        def test_table():
+            def expect(a, b):
+                EVALUATED.append(a)
+                assert b == a * 2
+
+            def where(_, a, b):
+                _ | a | b
+                for i in range(100):
+                    _ | i | a * 2
+
+        @pytest.mark.spock("{a}")
+        def test_single():
+            def expect(a):
+                pass
+
+            def where(a):
+                a << [1]
+
+        @pytest.mark.spock(unroll=False)
+        def test_rolled():
+            def expect(a):
+                EVALUATED.append(-a)
+
+            def where(a):
+                a << list(range(10))
+
+        def test_evaluated(request):
+            sampled = request.config.getoption("spock_sample") is not None
+            assert len(EVALUATED) == (10 + 1 if sampled else 100 + 10)
+        """
+    )
+    result = pytester.runpytest("--spock-sample=10%", "--spock-seed=3")
+    result.assert_outcomes(passed=13)
+    result.stdout.fnmatch_lines(["spock sample: 10% of each table (seed 3)"])
+    first = collected(pytester, "--spock-sample=10%", "--spock-seed=3")
+    assert len(first) == 13
+    assert collected(pytester, "--spock-sample=10%", "--spock-seed=3") == first
+    assert collected(pytester, "--spock-sample=10%", "--spock-seed=4") != first
+
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=103)
+
+
+def test_spock_sample_invalid(pytester):
+    result = pytester.runpytest("--spock-sample=0")
+    result.stderr.fnmatch_lines(["*--spock-sample: invalid sample '0'*"])
@@ -0,0 +1,77 @@
+import pytest
+
+from spock.shard import Shard
+
+
+def test_parse_shard():
+    shard = Shard.parse("2/5")
+    assert (shard.index, shard.count) == (2, 5)
+    assert str(shard) == "2/5"
+
+
+@pytest.mark.parametrize("value", ["0/3", "4/3", "1/0", "1", "a/b", "1/2/3"])
+def test_parse_invalid_shard(value):
+    with pytest.raises(ValueError):
+        Shard.parse(value)
+
+
+def test_shards_partition_node_ids():
+    nodeids = [f"test_a.py::test_spock[{i}]" for i in range(1000)]
+    shards = [Shard(i, 4) for i in range(1, 5)]
+    selected = [[nodeid for nodeid in nodeids if nodeid in s] for s in shards]
+    assert sorted(nodeid for ids in selected for nodeid in ids) == sorted(nodeids)
+    assert all(150 < len(nodeids) < 350 for nodeids in selected)
+
+
+def test_spock_shard_option(pytester):
+    pytester.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.spock("{a}")
+        def test_spock():
+            def expect(a):
+                assert a >= 0
+
+            def where(a):
+                a << list(range(30))
+
+        @pytest.mark.spock
+        def test_single():
+            def expect():
+                assert True
+        """
+    )
+    collected = []
+    for index in range(1, 4):
+        items, _ = pytester.inline_genitems(f"--spock-shard={index}/3")
+        collected.append({item.nodeid for item in items})
+
+    assert sum(len(nodeids) for nodeids in collected) == 31
+    assert len(set.union(*collected)) == 31
+
+
+def test_spock_shard_ini(pytester):
+    pytester.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.spock("{a}")
+        def test_spock():
+            def expect(a):
+                assert a >= 0
+
+            def where(a):
+                a << list(range(30))
+        """
+    )
+    pytester.makeini("[pytest]\nspock_shard = 2/2\n")
+    result = pytester.runpytest()
+    result.stdout.fnmatch_lines(["spock shard: 2/2"])
+    outcomes = result.parseoutcomes()
+    assert 0 < outcomes["passed"] < 30
+
+
+def test_spock_invalid_shard(pytester):
+    result = pytester.runpytest("--spock-shard=3/2")
+    result.stderr.fnmatch_lines(["*--spock-shard: invalid shard 3/2*"])
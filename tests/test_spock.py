@@ -1,5 +1,11 @@
+import json
+
+from xml.etree import ElementTree
+
 from spock.exceptions import UnableEvalParams
+from spock.spock import SpockPlan
 from spock.spock import generate_arguments
+from spock.spock import iter_arguments
 
 
 def test_generate_arguments_with_table_style_func():
@@ -36,6 +42,20 @@ def test_generate_arguments_with_table_style_failed():
     assert results[1] == {"a": 3, "b": 4}
 
 
+def test_iter_arguments_is_lazy():
+    def values(_, a, b):
+        _ | a | b
+        _ | 1 | a + 1
+        _ | 3 | b
+        _ | 5 | a + 1
+
+    rows = iter_arguments(values)
+    assert next(rows) == {"a": 1, "b": 2}
+    assert isinstance(next(rows), UnableEvalParams)
+    assert next(rows) == {"a": 5, "b": 6}
+    assert next(rows, None) is None
+
+
 def test_spock_function_with_where_block(pytester):
     pytester.makepyfile(
         """
@@ -270,3 +290,664 @@ def test_when_and_then_blocks(pytester):
 
     result = pytester.runpytest()
     result.assert_outcomes(passed=4, failed=1)
+
+
+def test_spock_plan():
+    def spec():
+        def given(me, tmpdir):
+            me.a = 1
+
+        def when(a, data):
+            pass
+
+        def then(excinfo, a, data):
+            pass
+
+        def cleanup(tmpdir):
+            pass
+
+        def where(_, data):
+            pass
+
+    plan = SpockPlan(spec)
+    assert plan.block_names == ("given", "when", "then", "cleanup", "where")
+    assert plan.argnames["then"] == ("excinfo", "a", "data")
+    assert plan.given_needs_me
+    assert plan.then_needs_excinfo
+    assert plan.has_assertions
+    assert plan.fixturenames == ("a", "data", "tmpdir")
+
+
+def test_blocks_are_fresh_per_iteration(pytester):
+    pytester.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.spock("{a}")
+        def test_unrolled():
+            seen = []
+
+            def when(a):
+                seen.append(a)
+
+            def then():
+                assert len(seen) == 1
+
+            def where(a):
+                a << [1, 2, 3]
+
+        @pytest.mark.spock(unroll=False, threads=3)
+        def test_rolled():
+            seen = []
+
+            def when(a):
+                seen.append(a)
+
+            def then(a):
+                assert seen == [a]
+
+            def where(a):
+                a << [1, 2, 3]
+        """
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=4)
+
+
+def test_given_block_without_me(pytester):
+    pytester.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.spock
+        def test_spock():
+            def given(tmpdir):
+                (tmpdir / "a.txt").write("a")
+
+            def expect(tmpdir):
+                assert (tmpdir / "a.txt").read() == "a"
+        """
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=1)
+
+
+def test_rolled_spock_function(pytester):
+    pytester.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.spock("{a}+{b}", unroll=False)
+        def test_spock():
+            def given(me, tmpdir):
+                me.c = a_plus_b(tmpdir)
+
+            def expect(a, b, c):
+                assert a + b == c
+
+            def where(_, a, b):
+                _ | a | b
+                _ | 1 | 2
+                _ | 2 | 2
+                _ | 3 | b
+
+        def a_plus_b(tmpdir):
+            return 3
+        """
+    )
+    items = pytester.inline_genitems()[0]
+    assert [item.name for item in items] == ["test_spock"]
+    assert [row_id for row_id, _ in items[0].rows] == [
+        "1+2",
+        "2+2",
+        "unable to eval 2 params",
+    ]
+
+    result = pytester.runpytest("-rf", "--junitxml=junit.xml")
+    result.assert_outcomes(failed=1)
+    result.stdout.fnmatch_lines(
+        [
+            "test_rolled_spock_function.py F *[[]100%[]]",
+            "_* test_spock _*",
+            "-* test_spock[[]2+2[]] -*",
+            "E       AssertionError",
+            "-* test_spock[[]unable to eval 2 params[]] -*",
+            "unable to eval 2 params: cyclic references between params: b -> b",
+            "*: 2 of 3 iterations failed: 2+2, unable to eval 2 params",
+            "FAILED *::test_spock - 2 of 3 iterations failed: *",
+        ]
+    )
+    result.stdout.no_fnmatch_line("*Captured stdout*")
+
+    suite = ElementTree.parse(pytester.path / "junit.xml").find("testsuite")
+    assert suite is not None
+    assert (suite.get("tests"), suite.get("failures")) == ("1", "1")
+    failure = suite.find("testcase/failure")
+    assert failure is not None
+    assert failure.get("message") == (
+        "2 of 3 iterations failed: 2+2, unable to eval 2 params"
+    )
+    assert "test_spock[2+2]" in failure.text
+
+
+def test_rolled_spock_function_passed(pytester):
+    pytester.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.spock(unroll=False)
+        def test_spock():
+            def when(a):
+                1 / a
+
+            def then(excinfo, failed):
+                assert (excinfo is not None) == failed
+
+            def cleanup(a):
+                print("cleanup", a)
+
+            def where(_, a, failed):
+                _ | a | failed
+                _ | 1 | False
+                _ | 0 | True
+        """
+    )
+    result = pytester.runpytest("-s")
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(["*cleanup 1", "cleanup 0"])
+
+
+def test_setup_spec_and_cleanup_spec_blocks(pytester):
+    pytester.makepyfile(
+        """
+        import pytest
+
+        calls = []
+
+        @pytest.mark.spock("{a}")
+        def test_spock():
+            def setup_spec(me, tmp_path_factory):
+                calls.append("setup_spec")
+                me.server = {"a": 1, "b": 2}
+
+            def given(me, server):
+                me.value = server
+
+            def expect(a, value, server):
+                assert value is server
+                assert a in server
+
+            def cleanup_spec(server, tmp_path_factory):
+                calls.append("cleanup_spec")
+                server.clear()
+
+            def where(_, a):
+                _ | a
+                _ | "a"
+                _ | "b"
+
+        def test_calls():
+            assert calls == ["setup_spec", "cleanup_spec"]
+        """
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=3)
+
+
+def test_setup_spec_block_failed(pytester):
+    pytester.makepyfile(
+        """
+        import pytest
+
+        calls = []
+
+        @pytest.mark.spock
+        def test_spock():
+            def setup_spec():
+                calls.append("setup_spec")
+                raise RuntimeError("boom")
+
+            def expect(a):
+                assert a
+
+            def cleanup_spec():
+                calls.append("cleanup_spec")
+
+            def where(a):
+                a << [1, 2, 3]
+
+        def test_calls():
+            assert calls == ["setup_spec"]
+        """
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=1, errors=3)
+    result.stdout.fnmatch_lines(
+        ["*RuntimeError: boom"]
+        + ["*SetupSpecError: setup_spec failed: RuntimeError: boom"] * 2
+    )
+
+
+def test_cleanup_spec_block_fixtures(pytester):
+    pytester.makepyfile(
+        """
+        import pytest
+
+        calls = []
+
+        @pytest.fixture(scope="module")
+        def resource():
+            return "resource"
+
+        @pytest.mark.spock
+        def test_spock():
+            def setup_spec(me):
+                me.value = 1
+
+            def expect(a, value):
+                assert a == value
+
+            def cleanup_spec(value, resource):
+                calls.append((value, resource))
+
+            def where(a):
+                a << [1, 1]
+
+        def test_calls():
+            assert calls == [(1, "resource")]
+        """
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=3)
+
+
+def test_spec_blocks_function_scoped_fixtures(pytester):
+    pytester.makepyfile(
+        """
+        import pytest
+
+        calls = []
+
+        @pytest.fixture(scope="module")
+        def resource():
+            return "resource"
+
+        @pytest.fixture
+        def fx():
+            calls.append("fx-setup")
+            yield object()
+            calls.append("fx-teardown")
+
+        @pytest.mark.spock
+        def test_fresh():
+            seen = set()
+
+            def setup_spec(me, resource):
+                me.value = resource
+
+            def expect(a, fx, value):
+                assert value == "resource"
+                assert fx not in seen
+                seen.add(fx)
+
+            def where(a):
+                a << [1, 2, 3]
+
+        @pytest.mark.spock
+        def test_rejected():
+            def setup_spec(me, fx):
+                pass
+
+            def expect(a):
+                pass
+
+            def where(a):
+                a << [1, 2]
+
+        @pytest.mark.spock
+        def test_rejected_in_cleanup_spec():
+            def expect(a):
+                pass
+
+            def cleanup_spec(fx):
+                pass
+
+            def where(a):
+                a << [1]
+
+        def test_calls():
+            assert calls.count("fx-setup") == 5
+            assert calls.count("fx-teardown") == 5
+        """
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=4, errors=3)
+    result.stdout.fnmatch_lines(
+        [
+            "*ValueError: setup_spec and cleanup_spec can't take the function "
+            "scoped fixture 'fx'*",
+            "*SetupSpecError: setup_spec failed: ValueError:*",
+        ]
+    )
+
+
+def test_spock_durations(pytester):
+    pytester.makepyfile(
+        """
+        import time
+        import pytest
+
+        @pytest.mark.spock("{a}")
+        def test_spock():
+            def given(me, a):
+                time.sleep(a)
+
+            def when():
+                pass
+
+            def then():
+                pass
+
+            def where(_, a):
+                _ | a
+                _ | 0.0
+                _ | 0.05
+
+        @pytest.mark.spock(unroll=False)
+        def test_rolled():
+            def expect(a):
+                assert a
+
+            def where(a):
+                a << [1, 2]
+        """
+    )
+    result = pytester.runpytest(
+        "--spock-durations=1", "--spock-durations-json=durations.json"
+    )
+    result.assert_outcomes(passed=3)
+    result.stdout.fnmatch_lines(
+        [
+            "*= slowest 1 spock iterations =*",
+            "0.*s given=0.*s when=0.00s then=0.00s  *::test_spock[[]0.05[]]",
+            "*- spock block durations per function -*",
+            "*::test_spock: given=0.*s when=0.00s then=0.00s (2 iterations)",
+            "*::test_rolled: expect=0.00s (2 iterations)",
+        ]
+    )
+
+    data = json.loads((pytester.path / "durations.json").read_text())
+    assert [it["nodeid"].split("::")[1] for it in data["iterations"]] == [
+        "test_spock[0.0]",
+        "test_spock[0.05]",
+        "test_rolled[1]",
+        "test_rolled[2]",
+    ]
+    assert set(data["iterations"][0]["durations"]) == {"given", "when", "then"}
+    assert [spec["iterations"] for spec in data["specs"]] == [2, 2]
+
+
+def test_spock_durations_disabled(pytester):
+    pytester.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.spock
+        def test_spock():
+            def expect():
+                pass
+        """
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=1)
+    result.stdout.no_fnmatch_line("*spock iterations*")
+
+
+def test_iterations_share_fixture_info(pytester):
+    pytester.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.spock("{a}-{b}")
+        def test_spock():
+            def expect(a, b):
+                assert a < b
+
+            def where(_, a, b):
+                _ | a | b
+                _ | 1 | 2
+                _ | 3 | 4
+        """
+    )
+    items = pytester.inline_genitems()[0]
+    assert [item.callspec.id for item in items] == ["1-2", "3-4"]
+    assert [item.callspec.params for item in items] == [
+        {"a": 1, "b": 2},
+        {"a": 3, "b": 4},
+    ]
+    assert items[0]._fixtureinfo is items[1]._fixtureinfo
+
+    result = pytester.runpytest("-k", "3-4", "-v")
+    result.assert_outcomes(passed=1, deselected=1)
+    result.stdout.fnmatch_lines(["*::test_spock[[]3-4[]] PASSED*"])
+
+
+def test_async_blocks(pytester):
+    pytester.makepyfile(
+        """
+        import asyncio
+        import pytest
+
+        @pytest.mark.spock("{a}")
+        def test_spock():
+            async def given(me, a):
+                await asyncio.sleep(0)
+                me.b = a + 1
+
+            async def when(b):
+                await asyncio.sleep(0)
+                if b > 2:
+                    raise ValueError(b)
+
+            def then(excinfo, a, b):
+                assert b == a + 1
+                assert (excinfo is None) == (b <= 2)
+
+            async def cleanup(b):
+                await asyncio.sleep(0)
+
+            def where(_, a):
+                _ | a
+                _ | 1
+                _ | 2
+        """
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=2)
+
+
+def test_concurrent_iterations(pytester):
+    pytester.makepyfile(
+        """
+        import asyncio
+        import pytest
+
+        running = []
+        peak = []
+
+        @pytest.mark.spock("{a}", concurrency=2)
+        def test_spock():
+            async def when(a):
+                running.append(a)
+                peak.append(len(running))
+                await asyncio.sleep(0.01)
+                running.remove(a)
+
+            def then(a):
+                assert a != 3
+
+            def where(a):
+                a << [1, 2, 3, 4, 5]
+
+        def test_peak():
+            assert max(peak) == 2
+        """
+    )
+    result = pytester.runpytest("-rf")
+    result.assert_outcomes(passed=1, failed=1)
+    result.stdout.fnmatch_lines(
+        [
+            "test_concurrent_iterations.py F. *[[]100%[]]",
+            "-* test_spock[[]3[]] -*",
+            "FAILED *::test_spock - 1 of 5 iterations failed: 3",
+        ]
+    )
+
+
+def test_invalid_concurrency(pytester):
+    pytester.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.spock(concurrency=0)
+        def test_spock():
+            def expect():
+                pass
+        """
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(errors=1)
+    result.stdout.fnmatch_lines(["*concurrency must be a positive integer, got 0"])
+
+
+def test_threaded_iterations(pytester):
+    pytester.makepyfile(
+        """
+        import asyncio
+        import threading
+        import pytest
+
+        calls = []
+        threads = set()
+
+        @pytest.fixture
+        def resource():
+            calls.append("resource")
+            return object()
+
+        @pytest.mark.spock("{a}", threads=4)
+        def test_spock():
+            def setup_spec(me):
+                calls.append("setup_spec")
+                me.barrier = threading.Barrier(4, timeout=5)
+
+            def given(me, a, barrier, resource):
+                threads.add(threading.current_thread().name)
+                barrier.wait()
+                me.b = a * 2
+
+            async def when(b):
+                await asyncio.sleep(0)
+
+            def then(a, b, resource):
+                assert b == a * 2
+                assert a != 3
+
+            def where(a):
+                a << [1, 2, 3, 4]
+
+        def test_calls():
+            assert calls == ["setup_spec", "resource"]
+            assert len(threads) == 4
+            assert all(name.startswith("spock") for name in threads)
+        """
+    )
+    result = pytester.runpytest("-rf")
+    result.assert_outcomes(passed=1, failed=1)
+    result.stdout.fnmatch_lines(
+        [
+            "test_threaded_iterations.py F. *[[]100%[]]",
+            "-* test_spock[[]3[]] -*",
+            "FAILED *::test_spock - 1 of 4 iterations failed: 3",
+        ]
+    )
+
+
+def test_threads_and_concurrency(pytester):
+    pytester.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.spock(threads=2, concurrency=2)
+        def test_spock():
+            def expect(a):
+                pass
+
+            def where(a):
+                a << [1, 2]
+        """
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(errors=1)
+    result.stdout.fnmatch_lines(["*concurrency and threads can't be used together"])
+
+
+def test_dedupe(pytester):
+    pytester.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.spock("{a}", dedupe=True)
+        def test_spock():
+            def expect(a, b):
+                assert a * 2 == b
+
+            def where(_, a, b):
+                _ | a   | b
+                _ | 1   | a * 2
+                _ | 1   | 2
+                _ | 1.0 | 2
+                _ | [2] | [2, 2]
+                _ | [2] | a * 2
+
+        @pytest.mark.spock(unroll=False, dedupe=True)
+        def test_rolled():
+            def expect(a):
+                assert a == 1
+
+            def where(a):
+                a << [1, 1, 1]
+        """
+    )
+    result = pytester.runpytest("-v")
+    result.assert_outcomes(passed=4)
+    result.stdout.fnmatch_lines(
+        [
+            "spock: 4 duplicate rows removed",
+            "*::test_spock[[]1[]] PASSED*",
+            "*::test_spock[[]1.0[]] PASSED*",
+            "*::test_spock[[][[]2[]][]] PASSED*",
+            "*::test_rolled PASSED*",
+        ]
+    )
+
+
+def test_dedupe_warn(pytester):
+    pytester.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.spock(dedupe="warn")
+        def test_spock():
+            def expect(a):
+                pass
+
+            def where(a):
+                a << [1, 2, 1, 1]
+        """
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=4, warnings=1)
+    result.stdout.fnmatch_lines(
+        ["*test_spock has 2 duplicate rows in its where table, at indices [[]2, 3[]]"]
+    )
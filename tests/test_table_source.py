@@ -0,0 +1,123 @@
+import pytest
+
+from spock import table_from_csv
+from spock import table_from_jsonl
+from spock.param_table import ParamTable
+from spock.parameter import AddArgumentsFailed
+from spock.parameter import declare
+from spock.parameter import eval_params
+
+
+@pytest.fixture(scope="function")
+def csv_file(tmp_path):
+    path = tmp_path / "cases.csv"
+    path.write_text('a,b,note\n1,2,"x, y"\n3,4,\n\n5,6,"multi\nline"\n')
+    return path
+
+
+@pytest.fixture(scope="function")
+def jsonl_file(tmp_path):
+    path = tmp_path / "cases.jsonl"
+    path.write_text('{"a": 1, "b": [2]}\n\n{"a": 3}\n{"b": "4", "a": 5}')
+    return path
+
+
+def test_csv_rows(csv_file):
+    source = table_from_csv(csv_file)
+    assert list(source.rows(["b", "a"])) == [("2", "1"), ("4", "3"), ("6", "5")]
+    assert list(source.rows(["note"])) == [("x, y",), ("",), ("multi\nline",)]
+
+
+def test_csv_rows_with_converters(csv_file):
+    source = table_from_csv(csv_file, {"a": int, "b": float})
+    assert list(source.rows(["a", "b"])) == [(1, 2.0), (3, 4.0), (5, 6.0)]
+
+
+def test_csv_rows_read_in_chunks(csv_file):
+    source = table_from_csv(csv_file, {"a": int}, chunk_size=3)
+    assert list(source.rows(["a", "note"])) == [
+        (1, "x, y"),
+        (3, ""),
+        (5, "multi\nline"),
+    ]
+
+
+def test_csv_rows_without_header(tmp_path):
+    path = tmp_path / "cases.tsv"
+    path.write_text("1\t2\n3\n")
+    source = table_from_csv(path, header=False, delimiter="\t")
+    assert list(source.rows(["a", "b"])) == [("1", "2"), ("3", None)]
+
+
+def test_csv_missing_columns(csv_file):
+    with pytest.raises(ValueError, match=r"columns \['c'\] not found"):
+        list(table_from_csv(csv_file).rows(["a", "c"]))
+
+
+def test_empty_csv(tmp_path):
+    path = tmp_path / "empty.csv"
+    path.write_text("")
+    assert list(table_from_csv(path, header=False).rows(["a"])) == []
+
+
+def test_jsonl_rows(jsonl_file):
+    source = table_from_jsonl(jsonl_file, {"b": str})
+    assert list(source.rows(["a", "b"])) == [(1, "[2]"), (3, None), (5, "4")]
+
+
+def test_table_with_source(csv_file):
+    a, b, c = declare("a", "b", "c")
+    table = ParamTable()
+    table | a | b
+    table << table_from_csv(csv_file, {"a": int, "b": lambda v: a + int(v)})
+    table | c
+    table | "first"
+
+    assert [eval_params(**row) for row in table.iter_dicts()] == [
+        {"a": 1, "b": 3, "c": "first"},
+        {"a": 3, "b": 7, "c": None},
+        {"a": 5, "b": 11, "c": None},
+    ]
+
+
+def test_table_source_requires_columns(csv_file):
+    table = ParamTable()
+    with pytest.raises(AddArgumentsFailed):
+        table << table_from_csv(csv_file)
+    with pytest.raises(AddArgumentsFailed):
+        table << [1, 2]  # type: ignore
+
+
+def test_spock_function_with_csv_table(pytester):
+    pytester.makefile(".csv", cases="a,b,c\n3,7,7\n5,4,5\n9,9,8\n")
+    pytester.makepyfile(
+        """
+        import pytest
+        import spock
+
+        @pytest.mark.spock("max({a}, {b}) == {c}")
+        def test_spock():
+            def expect(a, b, c):
+                assert max(a, b) == c
+
+            def where(_, a, b, c):
+                _ | a | b | c
+                _ << spock.table_from_csv("cases.csv", dict(a=int, b=int, c=int))
+        """
+    )
+    result = pytester.runpytest("-v")
+    result.assert_outcomes(passed=2, failed=1)
+    result.stdout.fnmatch_lines(["*test_spock?max(9, 9) == 8? FAILED*"])
+
+
+def test_table_source_requires_rows():
+    from spock.table_source import FileTableSource
+    from spock.table_source import TableSource
+
+    class NoRows(TableSource):
+        pass
+
+    with pytest.raises(TypeError):
+        NoRows()  # type: ignore
+    with pytest.raises(TypeError):
+        FileTableSource("cases.csv")  # type: ignore
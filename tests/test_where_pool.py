@@ -0,0 +1,176 @@
+import pickle
+
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+
+from spock.exceptions import CyclicParamsError
+from spock.exceptions import UnableEvalParams
+from spock.where_pool import WherePool
+from spock.where_pool import evaluate_where_source
+from spock.where_pool import get_literal_where_source
+from spock.where_pool import where_futures_key
+
+
+def literal_table():
+    def where(_, a, b, c):
+        _ | a | b | c
+        _ | 1 | -2.5 | "x"
+        _ | (1, 2) | {"k": [None]} | a
+
+
+def literal_pipe():
+    def where(a, b):
+        a << [1, 2]
+        b << ["x", "y"]
+
+
+def derived_table():
+    def where(_, a, b):
+        _ | a | b
+        _ | 1 | a + 1
+
+
+def global_table():
+    def where(_, a):
+        _ | a
+        _ | pytest
+
+
+def test_get_literal_where_source():
+    assert get_literal_where_source(literal_table) is not None
+    assert get_literal_where_source(literal_pipe) is not None
+    assert get_literal_where_source(derived_table) is None
+    assert get_literal_where_source(global_table) is None
+
+
+def test_evaluate_where_source():
+    assert evaluate_where_source(get_literal_where_source(literal_table)) == [
+        {"a": 1, "b": -2.5, "c": "x"},
+        {"a": (1, 2), "b": {"k": [None]}, "c": (1, 2)},
+    ]
+    assert evaluate_where_source(get_literal_where_source(literal_pipe)) == [
+        {"a": 1, "b": "x"},
+        {"a": 2, "b": "y"},
+    ]
+
+
+def test_evaluate_where_source_failed():
+    source = "def where(_, a, b):\n    _ | a | b\n    _ | b | a\n"
+    (error,) = evaluate_where_source(source)
+    assert isinstance(error, UnableEvalParams)
+
+    error = pickle.loads(pickle.dumps(error))
+    assert isinstance(error, CyclicParamsError)
+    assert error.names == ["a", "b", "a"]
+
+
+def test_spock_where_workers(pytester):
+    pytester.makeconftest(
+        """
+        from spock.where_pool import WherePool
+
+        pool_results = {}
+        result = WherePool.result
+
+        def record_result(self, collector, name):
+            rows = pool_results[name] = result(self, collector, name)
+            return rows
+
+        WherePool.result = record_result
+
+        def pytest_terminal_summary(terminalreporter):
+            for name, rows in sorted(pool_results.items()):
+                terminalreporter.write_line(f"pool {name}: {rows is not None}")
+
+        def pytest_unconfigure():
+            WherePool.result = result
+        """
+    )
+    pytester.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.spock("{a}")
+        def test_literal():
+            def expect(a, b):
+                assert a < b
+
+            def where(_, a, b):
+                _ | a | b
+                _ | 1 | 2
+                _ | 3 | 4
+
+        @pytest.mark.spock("{a}")
+        def test_derived():
+            def expect(a, b):
+                assert a < b
+
+            def where(_, a, b):
+                _ | a | b
+                _ | 1 | a + 1
+
+        class TestClass:
+            @pytest.mark.spock("{a}")
+            def test_pipe(self):
+                def expect(a):
+                    assert a
+
+                def where(a):
+                    a << [1, 2]
+
+        @pytest.mark.spock
+        def test_failed():
+            def expect(a, b):
+                pass
+
+            def where(_, a, b):
+                _ | a | b
+                _ | b | a
+        """
+    )
+    result = pytester.runpytest("--spock-where-workers=2", "-v")
+    result.assert_outcomes(passed=5, errors=1)
+    result.stdout.fnmatch_lines(
+        [
+            "*::test_literal[[]1[]] PASSED*",
+            "*::test_literal[[]3[]] PASSED*",
+            "*::test_derived[[]1[]] PASSED*",
+            "*::TestClass::test_pipe[[]1[]] PASSED*",
+            "*::TestClass::test_pipe[[]2[]] PASSED*",
+            "*::test_failed[[]unable to eval 0 params[]] ERROR*",
+        ]
+    )
+    # only the derived table is evaluated in process
+    result.stdout.fnmatch_lines(
+        [
+            "pool test_derived: False",
+            "pool test_failed: True",
+            "pool test_literal: True",
+            "pool test_pipe: True",
+        ]
+    )
+
+
+def test_where_pool_logs_worker_errors(caplog):
+    future = Future()
+    future.set_exception(RuntimeError("worker died"))
+    collector = SimpleNamespace(stash={where_futures_key: {"test_spock": future}})
+
+    assert WherePool(1).result(collector, "test_spock") is None  # type: ignore
+    assert "where block of test_spock in a worker failed" in caplog.text
+    assert "worker died" in caplog.text
+
+
+def test_spock_where_workers_invalid(pytester):
+    result = pytester.runpytest("--spock-where-workers=-1")
+    result.stderr.fnmatch_lines(
+        ["*--spock-where-workers: invalid number of workers -1, expected N >= 0"]
+    )
+
+    pytester.makeini("[pytest]\nspock_where_workers = two\n")
+    result = pytester.runpytest()
+    result.stderr.fnmatch_lines(
+        ["*spock_where_workers: invalid number of workers 'two', expected N >= 0"]
+    )